@@ -0,0 +1,71 @@
+"""
+Benchmark the injury page parsers against ESPN-shaped pages in benchmarks/fixtures/
+
+The checked-in page is a synthetic stand-in, see benchmarks/fixtures/README.md.
+
+Run from the repo root:
+    python -m benchmarks.bench_injuries [runs]
+"""
+import sys
+import time
+from pathlib import Path
+from bs4 import BeautifulSoup
+from utils.injuries import parse_injuries, HTMLParser
+from utils.models import InjuredPlayer, Team
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+
+def parse_full_tree(content):
+    # the original approach: whole-page html.parser tree and a find per cell
+    soup = BeautifulSoup(content, 'html.parser')
+    all_teams_data = []
+    for team_block in soup.find_all("div", class_="ResponsiveTable Table__league-injuries"):
+        team_name = team_block.find("span", class_="injuries__teamName").text.strip()
+        rows = team_block.find("tbody", class_="Table__TBODY").find_all("tr", class_="Table__TR")
+        players_data = []
+        for row in rows:
+            players_data.append(InjuredPlayer(
+                name=row.find("td", class_="col-name").text.strip(),
+                position=row.find("td", class_="col-pos").text.strip(),
+                return_date=row.find("td", class_="col-date").text.strip(),
+                status=row.find("td", class_="col-stat").text.strip(),
+                comment=row.find("td", class_="col-desc").text.strip()
+            ))
+        all_teams_data.append(Team(team_name, players_data))
+    return all_teams_data
+
+
+def available_parsers():
+    parsers = {'full tree (original)': parse_full_tree}
+    parsers['html.parser + strainer'] = lambda c: parse_injuries(c, 'html.parser')
+    try:
+        import lxml
+        parsers['lxml + strainer'] = lambda c: parse_injuries(c, 'lxml')
+    except ImportError:
+        pass
+    if HTMLParser is not None:
+        parsers['selectolax'] = lambda c: parse_injuries(c, 'selectolax')
+    return parsers
+
+
+def main(runs: int = 20) -> None:
+    for fixture in sorted(FIXTURES.glob('espn_*_injuries.html')):
+        content = fixture.read_bytes()
+        expected = parse_full_tree(content)
+        print(f"{fixture.name} ({len(content) / 1024:.0f} KB, {len(expected)} teams)")
+
+        for name, parse in available_parsers().items():
+            if parse(content) != expected:
+                print(f"  {name:<24} output differs from the original parser")
+                continue
+
+            start = time.perf_counter()
+            for _ in range(runs):
+                parse(content)
+            elapsed_ms = (time.perf_counter() - start) * 1000 / runs
+            print(f"  {name:<24} {elapsed_ms:8.2f} ms/parse")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
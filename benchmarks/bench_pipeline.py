@@ -0,0 +1,248 @@
+"""
+Benchmark the command data paths offline against the fixtures in benchmarks/fixtures/
+
+The checked-in fixtures are synthetic stand-ins shaped like the upstream
+responses, so the numbers compare code paths against each other and are
+not real-world latencies.
+
+Pinnacle JSON and ESPN pages are served by a local HTTP server that the
+fetch paths are pointed at, so get_lines and get_injuries go through the
+real http client, parser, formatter and caches. Yahoo frames are replayed
+through the snapshot get_stock_info and create_stock_chart read from.
+
+Run from the repo root:
+    python -m benchmarks.bench_pipeline [runs] [--concurrency N] [--latency MS]
+
+--latency adds a fixed delay to every replayed upstream response.
+
+Each case is measured cold (caches cleared before every run) and, where a
+cache applies, warm. Peak memory is what tracemalloc sees in this process,
+so chart rendering in the worker processes isn't counted.
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+# fetch_markets sends these as headers, so they only need to be set
+os.environ.setdefault('X-RAPIDAPI-KEY', 'benchmark')
+os.environ.setdefault('X-RAPIDAPI-HOST', 'localhost')
+
+import pandas as pd
+from utils import lines, injuries, data_access, http_client
+from utils.helper_functions import generate_response_list
+from utils.market_data import market_cache
+from utils.lines import sports_map
+from .record_fixtures import FIXTURES, TICKERS, _frame_name
+
+SPORT_IDS = {sport_id: sport for sport, (sport_id, _) in sports_map.items()}
+STOCK_PERIODS = ['1d', '1y']
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Answers the Pinnacle markets and ESPN injuries urls from fixtures/"""
+
+    latency = 0.0
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/kit/v1/markets':
+            sport = SPORT_IDS.get(parse_qs(url.query).get('sport_id', [''])[0])
+            fixture = FIXTURES / f'pinnacle_{sport}.json'
+            content_type = 'application/json'
+        else:
+            # /<sport>/injuries
+            fixture = FIXTURES / f'espn_{url.path.strip("/").split("/")[0]}_injuries.html'
+            content_type = 'text/html; charset=utf-8'
+
+        if not fixture.exists():
+            self.send_error(404)
+            return
+
+        body = fixture.read_bytes()
+        time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """Local stand-in for the Pinnacle and ESPN hosts, on its own thread like a real remote"""
+
+    def __init__(self, latency: float = 0.0):
+        handler = type('Handler', (FixtureHandler,), {'latency': latency})
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        # the same overrides PINNACLE_BASE_URL and ESPN_BASE_URL set
+        lines.PINNACLE_BASE_URL = self.url
+        injuries.ESPN_BASE_URL = self.url
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class FixtureTicker:
+    """Stands in for yfinance.Ticker, answering from fixture frames"""
+
+    latency = 0.0
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+
+    @property
+    def info(self) -> dict:
+        time.sleep(self.latency)
+        return json.loads((FIXTURES / f'yf_{self.ticker}_info.json').read_text())
+
+    def history(self, period: str, interval: str, prepost: bool = False, auto_adjust: bool = True):
+        time.sleep(self.latency)
+        frame = pd.read_csv(FIXTURES / _frame_name(self.ticker, period, interval, prepost), index_col=0)
+        frame.index = pd.to_datetime(frame.index, utc=True).tz_convert('America/New_York')
+        return frame
+
+
+def fixture_snapshot(ticker: str, period: str):
+    snapshot = data_access.new_stock_snapshot(ticker, period)
+    snapshot.stock = FixtureTicker(ticker)
+    return snapshot
+
+
+def clear_caches() -> None:
+    data_access._events_cache.clear()
+    data_access._chart_cache.clear()
+    market_cache.clear()
+
+
+def cases() -> list:
+    """
+    Returns:
+        (name, run, cold) tuples: run is a zero-argument coroutine function,
+        cold says whether caches are cleared before every run
+    """
+    found = []
+    for sport in sports_map:
+        if (FIXTURES / f'pinnacle_{sport}.json').exists():
+            found.append((f'get_lines {sport} cold', lambda sport=sport: data_access.get_lines(sport), True))
+            found.append((f'get_lines {sport} warm', lambda sport=sport: data_access.get_lines(sport), False))
+
+        if (FIXTURES / f'espn_{sport}_injuries.html').exists():
+            async def injuries_cold(sport=sport):
+                # a refresh is the whole scrape: fetch, parse, index
+                await data_access.refresh_injuries(sport)
+                return await data_access.get_injuries(sport)
+            found.append((f'get_injuries {sport} cold', injuries_cold, True))
+            found.append((f'get_injuries {sport} warm', lambda sport=sport: data_access.get_injuries(sport), False))
+
+    for ticker in TICKERS:
+        for period in STOCK_PERIODS:
+            found.append((
+                f'get_stock_info {ticker} {period}',
+                lambda ticker=ticker, period=period: data_access.get_stock_info(ticker, period, fixture_snapshot(ticker, period)),
+                True
+            ))
+            found.append((
+                f'create_stock_chart {ticker} {period}',
+                lambda ticker=ticker, period=period: data_access.create_stock_chart(ticker, period, fixture_snapshot(ticker, period)),
+                True
+            ))
+
+    answer = FIXTURES / 'deepseek_answer.md'
+    if answer.exists():
+        text = answer.read_text()
+
+        async def split_answer():
+            return generate_response_list([text])
+        found.append(('generate_response_list answer', split_answer, False))
+
+    return found
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def measure(run, cold: bool, runs: int, concurrency: int) -> dict:
+    # one untimed run so lazy imports and worker startup aren't counted
+    await run()
+
+    latencies = []
+    for _ in range(runs):
+        if cold:
+            clear_caches()
+        start = time.perf_counter()
+        await run()
+        latencies.append(time.perf_counter() - start)
+
+    # throughput: batches of concurrent calls, sharing whatever they can like real commands do
+    batches = max(1, runs // concurrency)
+    start = time.perf_counter()
+    for _ in range(batches):
+        if cold:
+            clear_caches()
+        await asyncio.gather(*(run() for _ in range(concurrency)))
+    throughput = batches * concurrency / (time.perf_counter() - start)
+
+    if cold:
+        clear_caches()
+    tracemalloc.start()
+    await run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'p50': _percentile(latencies, 0.5) * 1000,
+        'p95': _percentile(latencies, 0.95) * 1000,
+        'max': max(latencies) * 1000,
+        'ops': throughput,
+        'peak_mb': peak / 1024 / 1024
+    }
+
+
+async def main(runs: int, concurrency: int, latency: float) -> None:
+    FixtureTicker.latency = latency
+    with FixtureServer(latency):
+        print(f"{runs} runs, concurrency {concurrency}, upstream latency {latency * 1000:.0f} ms")
+        print("fixtures are synthetic stand-ins, not recorded upstream responses")
+        print(f"{'case':<34} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'ops/s':>9} {'peak MB':>8}")
+        try:
+            for name, run, cold in cases():
+                result = await measure(run, cold, runs, concurrency)
+                print(f"{name:<34} {result['p50']:8.3f} {result['p95']:8.3f} {result['max']:8.3f} "
+                      f"{result['ops']:9.1f} {result['peak_mb']:8.2f}")
+        finally:
+            await http_client.close()
+            data_access.shutdown_chart_pool()
+
+
+def _option(args: list[str], name: str, default: float) -> float:
+    if name in args:
+        return float(args[args.index(name) + 1])
+    return default
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    positional = [arg for i, arg in enumerate(args) if not arg.startswith('--') and (i == 0 or not args[i - 1].startswith('--'))]
+    asyncio.run(main(
+        int(positional[0]) if positional else 20,
+        int(_option(args, '--concurrency', 8)),
+        _option(args, '--latency', 0) / 1000
+    ))
@@ -0,0 +1,238 @@
+"""
+Write the fixtures the offline benchmarks replay
+
+The fixtures checked in to benchmarks/fixtures/ are synthetic stand-ins,
+not recorded responses. Running without --synthetic overwrites them with
+live captures.
+
+Run from the repo root:
+    python -m benchmarks.record_fixtures             # live Pinnacle, ESPN and Yahoo (needs the .env keys)
+    python -m benchmarks.record_fixtures --synthetic # deterministic stand-ins of the same shape, no network
+
+Writes into benchmarks/fixtures/:
+    pinnacle_<sport>.json            raw /kit/v1/markets response
+    espn_<sport>_injuries.html       raw injuries page
+    yf_<ticker>_info.json            Ticker.info
+    yf_<ticker>_<period>_<interval>[_prepost].csv   Ticker.history frames
+    deepseek_answer.md               a long markdown answer for generate_response_list (--synthetic only)
+"""
+import asyncio
+import json
+import math
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+SPORTS = ['nfl', 'nba', 'mlb']
+TICKERS = ['AAPL']
+
+# every history frame get_stock_info and create_stock_chart read for the benchmarked periods:
+# (period, interval, prepost)
+HISTORY_FRAMES = [
+    ('1d', '1d', False),
+    ('1d', '5m', True),
+    ('1y', '1d', False)
+]
+
+HISTORY_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume', 'Dividends', 'Stock Splits']
+
+TEAMS = {
+    'nfl': ["Buffalo Bills", "Miami Dolphins", "New England Patriots", "New York Jets", "Baltimore Ravens",
+            "Cincinnati Bengals", "Cleveland Browns", "Pittsburgh Steelers", "Houston Texans", "Indianapolis Colts",
+            "Jacksonville Jaguars", "Tennessee Titans", "Denver Broncos", "Kansas City Chiefs", "Las Vegas Raiders",
+            "Los Angeles Chargers", "Dallas Cowboys", "New York Giants", "Philadelphia Eagles", "Washington Commanders",
+            "Chicago Bears", "Detroit Lions", "Green Bay Packers", "Minnesota Vikings", "Atlanta Falcons",
+            "Carolina Panthers", "New Orleans Saints", "Tampa Bay Buccaneers", "Arizona Cardinals",
+            "Los Angeles Rams", "San Francisco 49ers", "Seattle Seahawks"],
+    'nba': ["Boston Celtics", "Brooklyn Nets", "New York Knicks", "Philadelphia 76ers", "Toronto Raptors",
+            "Chicago Bulls", "Cleveland Cavaliers", "Detroit Pistons", "Indiana Pacers", "Milwaukee Bucks",
+            "Atlanta Hawks", "Charlotte Hornets", "Miami Heat", "Orlando Magic", "Washington Wizards",
+            "Denver Nuggets", "Minnesota Timberwolves", "Oklahoma City Thunder", "Portland Trail Blazers",
+            "Utah Jazz", "Golden State Warriors", "Los Angeles Clippers", "Los Angeles Lakers", "Phoenix Suns",
+            "Sacramento Kings", "Dallas Mavericks", "Houston Rockets", "Memphis Grizzlies",
+            "New Orleans Pelicans", "San Antonio Spurs"],
+    'mlb': ["Baltimore Orioles", "Boston Red Sox", "New York Yankees", "Tampa Bay Rays", "Toronto Blue Jays",
+            "Chicago White Sox", "Cleveland Guardians", "Detroit Tigers", "Kansas City Royals", "Minnesota Twins",
+            "Houston Astros", "Los Angeles Angels", "Athletics", "Seattle Mariners", "Texas Rangers",
+            "Atlanta Braves", "Miami Marlins", "New York Mets", "Philadelphia Phillies", "Washington Nationals",
+            "Chicago Cubs", "Cincinnati Reds", "Milwaukee Brewers", "Pittsburgh Pirates", "St. Louis Cardinals",
+            "Arizona Diamondbacks", "Colorado Rockies", "Los Angeles Dodgers", "San Diego Padres",
+            "San Francisco Giants"]
+}
+
+# sport: (typical spread, typical total)
+LINE_SHAPES = {
+    'nfl': (3.5, 44.5),
+    'nba': (5.5, 226.5),
+    'mlb': (1.5, 8.5)
+}
+
+
+def _frame_name(ticker: str, period: str, interval: str, prepost: bool) -> str:
+    return f"yf_{ticker}_{period}_{interval}{'_prepost' if prepost else ''}.csv"
+
+
+async def record_live() -> None:
+    # imported here so --synthetic works without the keys or network
+    from utils import lines, injuries, stocks_helper, http_client
+
+    for sport in SPORTS:
+        markets = await lines.fetch_markets(sport)
+        (FIXTURES / f'pinnacle_{sport}.json').write_text(json.dumps(markets))
+        (FIXTURES / f'espn_{sport}_injuries.html').write_bytes(await injuries.fetch_injuries_page(sport))
+    await http_client.close()
+
+    for ticker in TICKERS:
+        stock = stocks_helper.MarketSnapshot(ticker).stock
+        (FIXTURES / f'yf_{ticker}_info.json').write_text(json.dumps(stock.info, default=str))
+        for period, interval, prepost in HISTORY_FRAMES:
+            hist = stock.history(period=period, interval=interval, prepost=prepost, auto_adjust=False)
+            hist.to_csv(FIXTURES / _frame_name(ticker, period, interval, prepost))
+
+
+def _decimal_odds(rng: random.Random) -> float:
+    return round(rng.uniform(1.5, 2.6), 3)
+
+
+def synthetic_markets(sport: str, rng: random.Random) -> dict:
+    teams = TEAMS[sport]
+    spread, total = LINE_SHAPES[sport]
+    sport_id, league_id = {'nfl': (7, 889), 'nba': (3, 487), 'mlb': (9, 246)}[sport]
+    start = datetime(2025, 10, 18, 17, 0)
+    events = []
+
+    order = teams[:]
+    rng.shuffle(order)
+    for i in range(0, len(order) - 1, 2):
+        home, away = order[i], order[i + 1]
+        # the main line first, then alternates, like pinnacle returns them
+        spreads = {}
+        for step in range(4):
+            hdp = -spread + step
+            spreads[str(hdp)] = {'hdp': hdp, 'alt_line_id': None if step == 0 else rng.randint(10**9, 2 * 10**9),
+                                 'home': _decimal_odds(rng), 'away': _decimal_odds(rng), 'max': 5000.0}
+        totals = {}
+        for step in range(4):
+            points = total + step * (1 if sport != 'mlb' else 0.5)
+            totals[str(points)] = {'points': points, 'alt_line_id': None if step == 0 else rng.randint(10**9, 2 * 10**9),
+                                   'over': _decimal_odds(rng), 'under': _decimal_odds(rng), 'max': 3000.0}
+        event = {
+            'event_id': 1600000000 + rng.randint(0, 10**7),
+            'sport_id': sport_id,
+            'league_id': league_id,
+            'league_name': sport.upper(),
+            'starts': (start + timedelta(hours=3 * (i // 2))).strftime('%Y-%m-%dT%H:%M:%S'),
+            'last': 1760800000 + i,
+            'home': home,
+            'away': away,
+            'event_type': 'live' if i == 0 else 'prematch',
+            'live_status_id': 1 if i == 0 else 0,
+            'parent_id': None,
+            'resulting_unit': 'Regular',
+            'is_actual': True,
+            'home_team_type': 'Team1',
+            'is_have_odds': True,
+            'is_have_periods': True,
+            'is_have_open_markets': True,
+            'periods': {
+                'num_0': {
+                    'line_id': rng.randint(10**9, 3 * 10**9),
+                    'number': 0,
+                    'description': 'Game',
+                    'period_status': 1,
+                    'cutoff': (start + timedelta(hours=3 * (i // 2))).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                    'money_line': {'home': _decimal_odds(rng), 'draw': None, 'away': _decimal_odds(rng)},
+                    'spreads': spreads,
+                    'totals': totals,
+                    'team_total': {'home': {'points': total / 2, 'over': 1.9, 'under': 1.9},
+                                   'away': {'points': total / 2, 'over': 1.9, 'under': 1.9}},
+                    'meta': {'number': 0, 'max_spread': 5000.0, 'max_money_line': 5000.0, 'max_total': 3000.0}
+                }
+            }
+        }
+        events.append(event)
+
+        # mlb boards carry a hits + runs + errors prop per game, which the parser skips
+        if sport == 'mlb':
+            prop = json.loads(json.dumps(event))
+            prop['event_id'] += 1
+            prop['parent_id'] = event['event_id']
+            prop['resulting_unit'] = 'Hits + Runs + Errors'
+            events.append(prop)
+
+    return {'sport_id': sport_id, 'sport_name': sport.upper(), 'last': 1760800000, 'last_call': 1760800000,
+            'events': events}
+
+
+def synthetic_history(period: str, interval: str, prepost: bool, rng: random.Random):
+    import pandas as pd
+
+    if interval == '5m':
+        day = pd.Timestamp('2025-10-17', tz='America/New_York')
+        first, last = (day + pd.Timedelta(hours=4), day + pd.Timedelta(hours=19, minutes=55)) if prepost else \
+            (day + pd.Timedelta(hours=9, minutes=30), day + pd.Timedelta(hours=15, minutes=55))
+        index = pd.date_range(first, last, freq='5min', name='Datetime')
+    elif period == '1d':
+        index = pd.DatetimeIndex([pd.Timestamp('2025-10-17', tz='America/New_York')], name='Date')
+    else:
+        index = pd.bdate_range('2024-10-18', '2025-10-17', tz='America/New_York', name='Date')
+
+    price = 250.0
+    rows = []
+    for _ in index:
+        open_price = price
+        price = max(1.0, price * math.exp(rng.gauss(0, 0.002 if interval == '5m' else 0.015)))
+        high = max(open_price, price) * (1 + abs(rng.gauss(0, 0.001)))
+        low = min(open_price, price) * (1 - abs(rng.gauss(0, 0.001)))
+        rows.append([open_price, high, low, price, price, rng.randint(10**4, 10**6) * 10, 0.0, 0.0])
+    return pd.DataFrame(rows, index=index, columns=HISTORY_COLUMNS)
+
+
+def synthetic_info(ticker: str, rng: random.Random) -> dict:
+    return {
+        'symbol': ticker, 'longName': 'Apple Inc.', 'shortName': 'Apple Inc.', 'currency': 'USD',
+        'exchange': 'NMS', 'quoteType': 'EQUITY', 'previousClose': 249.34, 'open': 250.1,
+        'dayLow': 247.8, 'dayHigh': 252.9, 'volume': 48217300, 'averageVolume': 54108200,
+        'marketCap': 3702135799808, 'fiftyTwoWeekHigh': 260.1, 'fiftyTwoWeekLow': 169.21,
+        'trailingPE': 37.8, 'forwardPE': 30.1, 'dividendYield': 0.42, 'beta': 1.09,
+        # the real dict carries ~150 keys, pad it out so its size is in the right range
+        **{f'field_{i}': rng.random() for i in range(140)}
+    }
+
+
+def synthetic_answer(rng: random.Random) -> str:
+    words = ("market volatility earnings guidance revenue margin forecast dividend momentum "
+             "valuation liquidity sector rotation yield inflation duration hedge").split()
+    parts = []
+    for section in range(12):
+        parts.append(f"## Section {section + 1}\n\n")
+        for _ in range(3):
+            parts.append(' '.join(rng.choice(words) for _ in range(90)) + '.\n\n')
+        parts.append("- " + '\n- '.join(' '.join(rng.choice(words) for _ in range(12)) for _ in range(5)) + '\n\n')
+        if section % 3 == 0:
+            parts.append("```python\n" + '\n'.join(f"value_{i} = compute({i}, rate={rng.random():.4f})"
+                                                   for i in range(25)) + "\n```\n\n")
+    return ''.join(parts)
+
+
+def record_synthetic() -> None:
+    # seeded so every checkout benchmarks the same bytes
+    rng = random.Random(2025)
+    for sport in SPORTS:
+        (FIXTURES / f'pinnacle_{sport}.json').write_text(json.dumps(synthetic_markets(sport, rng)))
+    for ticker in TICKERS:
+        (FIXTURES / f'yf_{ticker}_info.json').write_text(json.dumps(synthetic_info(ticker, rng)))
+        for period, interval, prepost in HISTORY_FRAMES:
+            synthetic_history(period, interval, prepost, rng).to_csv(FIXTURES / _frame_name(ticker, period, interval, prepost))
+    (FIXTURES / 'deepseek_answer.md').write_text(synthetic_answer(rng))
+
+
+if __name__ == '__main__':
+    FIXTURES.mkdir(exist_ok=True)
+    if '--synthetic' in sys.argv[1:]:
+        record_synthetic()
+    else:
+        asyncio.run(record_live())
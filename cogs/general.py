@@ -3,6 +3,9 @@ from discord.ext import commands
 from discord import app_commands
 import discord
 import datetime
+from utils import startup, metrics
+from utils.delivery import pack_embeds
+from utils.helper_functions import generate_response_list, EMBED_DESCRIPTION_LIMIT
 
 class General(commands.Cog):
     # general bot commands and utilities
@@ -23,12 +26,28 @@ class General(commands.Cog):
         embed.add_field(
             name="🏈 Sports Commands",
             value=(
-                "`/lines <sport>` - Get betting lines (nfl, nba, mlb)\n"
-                "`/injuries <sport>` - Get injury reports (nfl, nba, mlb)"
+                "`/lines <sport> [team]` - Get betting lines (nfl, nba, mlb)\n"
+                "`/lines <sport> movement` - See how lines have moved\n"
+                "`/lines <sport> subscribe` - Post line moves in this channel\n"
+                "`/injuries <sport> [team]` - Get injury reports (nfl, nba, mlb)"
             ),
             inline=False
         )
         
+        # stock commands
+        embed.add_field(
+            name="📈 Stock Commands",
+            value=(
+                "`/stock <ticker> [period]` - Get stock information and chart\n"
+                "`/stocks <tickers> [period] [chart]` - Compare several stocks at once\n"
+                "`/watchlist add|remove <tickers> [scope]` - Edit your or the server's watchlist\n"
+                "`/watchlist show [scope] [period] [chart]` - Quotes for every ticker on a watchlist\n"
+                "`/alert <ticker> <above|below> <price>` - Get pinged when a stock crosses a price\n"
+                "`/alerts [cancel]` - List or cancel your price alerts"
+            ),
+            inline=False
+        )
+
         # AI commands
         embed.add_field(
             name="🤖 AI Commands",
@@ -43,7 +62,8 @@ class General(commands.Cog):
                 "`/help` - Show this message\n"
                 "`/ping` - Check bot latency\n"
                 "`/info` - Show bot information\n"
-                "`/serverinfo` - Show server information"
+                "`/serverinfo` - Show server information\n"
+                "`/startup`, `/stats` - Startup timings and command stats (bot owner only)"
             ),
             inline=False
         )
@@ -88,6 +108,37 @@ class General(commands.Cog):
         
         await interaction.response.send_message(embed=embed)
     
+    @app_commands.command(name='startup', description='Show where startup time went (bot owner only)')
+    async def startup_profile(self, interaction: discord.Interaction):
+        # boot profile: milestones, cog loads, command sync and lazy imports
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message("Only the bot owner can see the startup profile.", ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title="⏱️ Startup Profile",
+            description=startup.report(),
+            color=0x3498db
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    @app_commands.command(name='stats', description='Show command latency, cache hit rates and errors (bot owner only)')
+    async def stats(self, interaction: discord.Interaction):
+        # p50/p95/p99 per command and phase since the bot started
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message("Only the bot owner can see the stats.", ephemeral=True)
+            return
+
+        report_lines = [line + '\n' for line in metrics.report().split('\n')]
+        embeds = [
+            discord.Embed(title="📈 Stats", description=chunk, color=0x3498db)
+            for chunk in generate_response_list(report_lines, EMBED_DESCRIPTION_LIMIT)
+        ]
+        messages = pack_embeds(embeds)
+        await interaction.response.send_message(embeds=messages[0], ephemeral=True)
+        for message_embeds in messages[1:]:
+            await interaction.followup.send(embeds=message_embeds, ephemeral=True)
+    
     @app_commands.command(name='serverinfo', description='Show server information')
     async def serverinfo(self, interaction: discord.Interaction):
         # display information about the current server
@@ -1,25 +1,104 @@
 from discord.ext import commands
 from discord import app_commands
 import discord
-from utils.ai_helper import get_response
+import asyncio
+import time
+import logging
+from utils.data_access import get_ai_response, stream_ai_response, UpstreamTimeoutError
+from utils.ai_helper import AI_STREAMING, describe_error
+from utils.helper_functions import split_markdown, EMBED_DESCRIPTION_LIMIT
+from utils.delivery import send_embeds
+from utils import metrics
+
+EMBED_COLOR = 0x4E6BFD
+EDIT_INTERVAL = 1.0     # seconds between edits of a streaming message
+
+log = logging.getLogger(__name__)
 
 class LLM(commands.Cog):
     """AI-powered chat and assistance"""
-    
+
     def __init__(self, bot):
         self.bot = bot
-    
+
     @app_commands.command(name='ask', description='Ask the AI a question')
     async def ask(self, interaction: discord.Interaction, query: str):
         await interaction.response.defer()
 
-        response_list = get_response(query)
+        # the followup token dies 15 minutes after the command, stop the request with it
+        remaining = (interaction.expires_at - discord.utils.utcnow()).total_seconds()
+
+        if AI_STREAMING:
+            try:
+                await asyncio.wait_for(self._stream_answer(interaction, query), remaining)
+            except asyncio.TimeoutError:
+                log.warning("interaction expired while answering", extra={'query_chars': len(query)})
+            return
+
+        try:
+            response_list = await asyncio.wait_for(get_ai_response(query), remaining)
+        except UpstreamTimeoutError:
+            response_list = ["Error getting AI response: the request timed out"]
+        except asyncio.TimeoutError:
+            log.warning("interaction expired while answering", extra={'query_chars': len(query)})
+            return
+
+        log.info("ai response", extra={
+            'query_chars': len(query), 'response_chars': sum(len(response) for response in response_list)
+        })
+        log.debug("ai response text", extra={'query': query, 'response': response_list})
+
+        embeds = [discord.Embed(description=str(response), color=EMBED_COLOR) for response in response_list]
+        await send_embeds(interaction, embeds)
+
+    async def _stream_answer(self, interaction: discord.Interaction, query: str):
+        """Show the answer as it is generated, editing the followup in place"""
+        message = None      # message currently being edited
+        text = ''           # text shown in that message
+        full_response = []
+        last_edit = 0.0
+
+        async def show(content: str):
+            nonlocal message, last_edit
+            embed = discord.Embed(description=content, color=EMBED_COLOR)
+            with metrics.phase('send'):
+                if message is None:
+                    message = await interaction.followup.send(embed=embed, wait=True)
+                else:
+                    await message.edit(embed=embed)
+            last_edit = time.monotonic()
+
+        async def roll_over():
+            # finish full messages and carry the rest into a new one
+            nonlocal message, text
+            while len(text) > EMBED_DESCRIPTION_LIMIT:
+                head, text = split_markdown(text, EMBED_DESCRIPTION_LIMIT)
+                await show(head)
+                message = None
+
+        try:
+            async for piece in stream_ai_response(query):
+                full_response.append(piece)
+                text += piece
+                await roll_over()
+
+                # discord rate limits edits, so batch tokens between them
+                if text and time.monotonic() - last_edit >= EDIT_INTERVAL:
+                    await show(text)
+
+        except UpstreamTimeoutError:
+            text += "\n\nError getting AI response: the request timed out"
+        except Exception as e:
+            text += f"\n\n{describe_error(e)}"
 
-        print(f"AI Response for '{query}': {response_list}")
+        await roll_over()
+        if text or not full_response:
+            await show(text or "No response")
 
-        for response in response_list:
-            embed = discord.Embed(description=str(response), color=0x4E6BFD)
-            await interaction.followup.send(embed=embed)
+        log.info("ai response", extra={
+            'query_chars': len(query), 'response_chars': sum(len(piece) for piece in full_response), 'streamed': True
+        })
+        log.debug("ai response text", extra={'query': query, 'response': ''.join(full_response)})
 
 async def setup(bot):
-    await bot.add_cog(LLM(bot))
\ No newline at end of file
+    await bot.add_cog(LLM(bot))
@@ -1,20 +1,136 @@
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import discord
-from utils.lines import get_lines
-from utils.injuries import get_injuries
+import asyncio
+import random
+import logging
+import httpx
+from utils.data_access import (
+    get_lines, get_events, get_line_movement, get_injuries, refresh_injuries, team_names, UpstreamTimeoutError,
+    INJURY_REFRESH_INTERVAL, INJURY_REFRESH_JITTER, LINES_POLL_INTERVAL
+)
+from utils.delivery import send_embeds, send_embeds_to_channel
+from utils.lines import format_event, line_snapshot, changed_events
+from utils.subscriptions import subscription_store
 
 SPORTS_LIST = ['nfl', 'nba', 'mlb']
 SPORTS_TITLES = {
-    'nfl': {'lines': "NFL Lines", 'injuries': "NFL Injuries"},
-    'mlb': {'lines': "MLB Lines", 'injuries': "MLB Injuries"},
-    'nba': {'lines': "NBA Lines", 'injuries': "NBA Injuries"}
+    'nfl': {'lines': "NFL Lines", 'injuries': "NFL Injuries", 'moves': "NFL Line Moves", 'movement': "NFL Line Movement"},
+    'mlb': {'lines': "MLB Lines", 'injuries': "MLB Injuries", 'moves': "MLB Line Moves", 'movement': "MLB Line Movement"},
+    'nba': {'lines': "NBA Lines", 'injuries': "NBA Injuries", 'moves': "NBA Line Moves", 'movement': "NBA Line Movement"}
 }
 EMBED_COLOR = 0x9CAFBE
 
+log = logging.getLogger(__name__)
+
 class Sports(commands.Cog):
 
-    async def _send_sport_data(self, interaction, sport: str, data_type: str, fetch_func):
+    def __init__(self, bot):
+        self.bot = bot
+        # sport: channel ids, mirrored from the subscription store so polls don't read the disk
+        self.line_subscriptions = {sport: subscription_store.channels(sport) for sport in SPORTS_LIST}
+        self.line_snapshots = {}    # sport: line_snapshot from the last poll
+
+    async def cog_load(self):
+        self.injury_refresher.start()
+        self.line_poller.start()
+
+    async def cog_unload(self):
+        self.injury_refresher.cancel()
+        self.line_poller.cancel()
+
+    @tasks.loop(seconds=INJURY_REFRESH_INTERVAL)
+    async def injury_refresher(self):
+        # keeps injury reports warm so /injuries never waits on ESPN
+        for sport in SPORTS_LIST:
+            # spread the scrapes out instead of hitting ESPN in lockstep
+            await asyncio.sleep(random.uniform(0, INJURY_REFRESH_JITTER))
+            try:
+                await refresh_injuries(sport)
+            except Exception as e:
+                log.warning("injury refresh failed", extra={'sport': sport, 'error': repr(e)})
+
+    @tasks.loop(seconds=LINES_POLL_INTERVAL)
+    async def line_poller(self):
+        # one fetch per subscribed sport, fanned out to every subscribed channel
+        for sport, channel_ids in self.line_subscriptions.items():
+            if not channel_ids:
+                self.line_snapshots.pop(sport, None)
+                continue
+
+            try:
+                events = await get_events(sport)
+            except Exception as e:
+                log.warning("line poll failed", extra={'sport': sport, 'error': repr(e)})
+                continue
+
+            snapshot = line_snapshot(events)
+            previous = self.line_snapshots.get(sport)
+            self.line_snapshots[sport] = snapshot
+
+            # the first poll only sets the baseline
+            if previous is None:
+                continue
+
+            moved = set(changed_events(previous, snapshot))
+            if not moved:
+                continue
+
+            title = SPORTS_TITLES[sport]['moves']
+            embeds = [
+                discord.Embed(title=title, description=format_event(event), color=EMBED_COLOR)
+                for event in events if event.event_id in moved
+            ]
+
+            # channels have separate rate limits, so push to them concurrently
+            channels = list(channel_ids)
+            results = await asyncio.gather(
+                *(self._push_to_channel(channel_id, embeds) for channel_id in channels),
+                return_exceptions=True
+            )
+            for channel_id, result in zip(channels, results):
+                if isinstance(result, (discord.NotFound, discord.Forbidden)):
+                    # the channel is gone or the bot can't post there anymore
+                    log.info("dropping line subscription", extra={'sport': sport, 'channel_id': channel_id, 'error': repr(result)})
+                    channel_ids.discard(channel_id)
+                    subscription_store.remove(sport, channel_id)
+                elif isinstance(result, Exception):
+                    # rate limits, 5xx and network blips: try again next poll
+                    log.warning("line move delivery failed", extra={'sport': sport, 'channel_id': channel_id, 'error': repr(result)})
+
+    @line_poller.before_loop
+    async def before_line_poller(self):
+        # the channel cache is empty until the first READY
+        await self.bot.wait_until_ready()
+
+    async def _push_to_channel(self, channel_id: int, embeds):
+        # uncached isn't gone (threads, guilds back after a re-identify), so ask Discord;
+        # fetch_channel raises NotFound or Forbidden if it really is
+        channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+        await send_embeds_to_channel(channel, embeds)
+
+    async def _update_subscription(self, interaction: discord.Interaction, sport: str, subscribe: bool):
+        if sport not in SPORTS_LIST:
+            await interaction.response.send_message(f"Invalid sport. Choose from: {', '.join(SPORTS_LIST)}", ephemeral=True)
+            return
+
+        if not interaction.permissions.manage_channels:
+            await interaction.response.send_message("You need the Manage Channels permission to change line alerts.", ephemeral=True)
+            return
+
+        channel_ids = self.line_subscriptions[sport]
+        if subscribe:
+            channel_ids.add(interaction.channel_id)
+            subscription_store.add(sport, interaction.channel_id)
+            message = f"📡 This channel will get {sport.upper()} line moves (checked every {int(LINES_POLL_INTERVAL)}s)."
+        else:
+            channel_ids.discard(interaction.channel_id)
+            subscription_store.remove(sport, interaction.channel_id)
+            message = f"🔕 This channel will no longer get {sport.upper()} line moves."
+
+        await interaction.response.send_message(message)
+
+    async def _send_sport_data(self, interaction, sport: str, data_type: str, fetch_func, team: str = None):
         """Helper method to reduce duplication"""
         await interaction.response.defer()
 
@@ -23,19 +139,48 @@ class Sports(commands.Cog):
             return
 
         title = SPORTS_TITLES[sport][data_type]
-        response_list = fetch_func(sport)
-        
-        for response in response_list:
-            embed = discord.Embed(title=title, description=str(response), color=EMBED_COLOR)
-            await interaction.followup.send(embed=embed)
+        try:
+            response_list = await fetch_func(sport, team)
+        except UpstreamTimeoutError:
+            await interaction.followup.send(f"⏱️ {title} took too long to load. Try again shortly.")
+            return
+        except httpx.HTTPError as e:
+            # retries are used up, the source is down or refusing us
+            log.warning("sport data fetch failed", extra={'sport': sport, 'data_type': data_type, 'error': repr(e)})
+            await interaction.followup.send(f"❌ Couldn't load {title} right now. Try again later.")
+            return
+        except Exception:
+            # bad bodies or a changed page layout: answer the deferred interaction anyway, or it spins forever
+            log.exception("sport data failed", extra={'sport': sport, 'data_type': data_type})
+            await interaction.followup.send(f"❌ Couldn't load {title} right now. Try again later.")
+            return
+
+        embeds = [discord.Embed(title=title, description=str(response), color=EMBED_COLOR) for response in response_list]
+        await send_embeds(interaction, embeds)
     
     @app_commands.command(name='lines')
-    async def lines(self, interaction: discord.Interaction, sport: str):
-        await self._send_sport_data(interaction, sport, 'lines', get_lines)
+    @app_commands.describe(
+        mode='Show lines now, how they have moved, or get line moves posted in this channel',
+        team='Only show games for this team (show and movement modes)'
+    )
+    @app_commands.choices(mode=[
+        app_commands.Choice(name='show', value='show'),
+        app_commands.Choice(name='movement', value='movement'),
+        app_commands.Choice(name='subscribe', value='subscribe'),
+        app_commands.Choice(name='unsubscribe', value='unsubscribe')
+    ])
+    async def lines(self, interaction: discord.Interaction, sport: str, mode: str = 'show', team: str = None):
+        if mode == 'show':
+            await self._send_sport_data(interaction, sport, 'lines', get_lines, team)
+        elif mode == 'movement':
+            await self._send_sport_data(interaction, sport, 'movement', get_line_movement, team)
+        else:
+            await self._update_subscription(interaction, sport, mode == 'subscribe')
     
     @app_commands.command(name='injuries')
-    async def injuries(self, interaction: discord.Interaction, sport: str):
-        await self._send_sport_data(interaction, sport, 'injuries', get_injuries)
+    @app_commands.describe(team='Only show injuries for this team')
+    async def injuries(self, interaction: discord.Interaction, sport: str, team: str = None):
+        await self._send_sport_data(interaction, sport, 'injuries', get_injuries, team)
     
     @lines.autocomplete('sport')
     async def lines_autocomplete(self, interaction: discord.Interaction, current: str):
@@ -53,5 +198,20 @@ class Sports(commands.Cog):
                 data.append(app_commands.Choice(name=sport_choice, value=sport_choice))
         return data
 
+    @lines.autocomplete('team')
+    async def lines_team_autocomplete(self, interaction: discord.Interaction, current: str):
+        return self._team_choices(interaction, 'lines', current)
+
+    @injuries.autocomplete('team')
+    async def injuries_team_autocomplete(self, interaction: discord.Interaction, current: str):
+        return self._team_choices(interaction, 'injuries', current)
+
+    def _team_choices(self, interaction: discord.Interaction, data_type: str, current: str):
+        # teams come from the sport already picked in the same command
+        sport = interaction.namespace.sport
+        if sport not in SPORTS_LIST:
+            return []
+        return [app_commands.Choice(name=name, value=name) for name in team_names(sport, data_type, current)]
+
 async def setup(bot):
     await bot.add_cog(Sports(bot))
\ No newline at end of file
@@ -1,15 +1,202 @@
 # cogs/stocks.py
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import discord
-from utils.stocks_helper import create_stock_chart, get_stock_info
+import asyncio
+import time
+import logging
+from utils.data_access import (
+    create_stock_chart, get_stock_info, new_stock_snapshot, UpstreamTimeoutError,
+    get_quotes, get_latest_prices, create_quotes_chart, prefetch_stocks, shutdown_chart_pool, import_off_loop,
+    WATCHLIST_PREFETCH_INTERVAL, WATCHLIST_PREFETCH_CLOSED_INTERVAL, WATCHLIST_PREFETCH_MAX
+)
+from utils.stocks_helper import parse_tickers, is_trading_session, MAX_BATCH_TICKERS
+from utils.watchlists import watchlist_store
+from utils.alerts import alert_store, triggered, ALERT_CHECK_INTERVAL
+from utils.helper_functions import generate_response_list
+from utils import metrics
+
+# discord's limit for plain message content
+MESSAGE_CONTENT_LIMIT = 2000
+
+# prefetched entries outlive the prefetch interval by this factor
+WATCHLIST_PREFETCH_TTL_FACTOR = 1.5
+
+log = logging.getLogger(__name__)
+
+VALID_PERIODS = ["1d", "5d", "1m", "3m", "6m", "1y", "5y"]
+PERIOD_TO_TEXT = {
+    "1d" : "today",
+    "5d" : "past 5 days",
+    "1mo" : "past month",
+    "3mo" : "past 3 months",
+    "6mo" : "past 6 months",
+    "1y" : "past year",
+    "5y" : "past 5 years"
+}
+
+def api_period(period: str) -> str:
+    # "m" is months for users (even though m = minutes), the API wants "mo"
+    if period[1] == "m":
+        period += "o"
+    return period
 
 class Stocks(commands.Cog):
     # stock market information and charts
     
+    watchlist = app_commands.Group(name='watchlist', description='Save tickers and check them together')
+
     def __init__(self, bot):
         self.bot = bot
+        self._last_prefetch = float('-inf')
+
+    async def cog_load(self):
+        # chart workers are started by the bot's warm-up once it is ready
+        self.watchlist_prefetcher.start()
+        self.alert_checker.start()
+
+    async def cog_unload(self):
+        self.watchlist_prefetcher.cancel()
+        self.alert_checker.cancel()
+        shutdown_chart_pool()
+
+    @tasks.loop(seconds=WATCHLIST_PREFETCH_INTERVAL)
+    async def watchlist_prefetcher(self):
+        # keeps watchlisted tickers warm so most /stock calls are cache hits;
+        # every tick while the market trades, only now and then once it's closed
+        now = time.monotonic()
+        trading = is_trading_session()
+        if not trading and now - self._last_prefetch < WATCHLIST_PREFETCH_CLOSED_INTERVAL:
+            return
+        self._last_prefetch = now
+
+        # the 5m chart frame and info normally expire sooner than the next prefetch,
+        # so prefetched entries live until it (with slack for a slow run) instead
+        interval = WATCHLIST_PREFETCH_INTERVAL if trading else WATCHLIST_PREFETCH_CLOSED_INTERVAL
+        min_ttl = interval * WATCHLIST_PREFETCH_TTL_FACTOR
+
+        tickers = watchlist_store.watched_tickers(WATCHLIST_PREFETCH_MAX)
+        if not tickers:
+            return
+
+        try:
+            failed = await prefetch_stocks(tickers, min_ttl)
+        except Exception as e:
+            log.warning("watchlist prefetch failed", extra={'error': repr(e)})
+            return
+        if failed:
+            log.info("watchlist prefetch incomplete", extra={'failed': failed, 'tickers': len(tickers)})
     
+    @tasks.loop(seconds=ALERT_CHECK_INTERVAL)
+    async def alert_checker(self):
+        # one batched quote request and one array comparison per tick, however many alerts exist
+        if not is_trading_session():
+            return
+
+        # the alert arrays are numpy, keep its first import off the loop
+        await import_off_loop('numpy')
+        alerts = alert_store.arrays()
+        if not len(alerts['id']):
+            return
+
+        try:
+            prices = await get_latest_prices(sorted(set(alerts['ticker'])))
+        except Exception as e:
+            log.warning("price alert check failed", extra={'error': repr(e)})
+            return
+
+        hit = triggered(alerts, prices)
+        if not hit.any():
+            return
+
+        notices = {}    # channel_id: ([lines], [alert ids])
+        for i in hit.nonzero()[0]:
+            ticker = alerts['ticker'][i]
+            condition = 'above' if alerts['sign'][i] > 0 else 'below'
+            lines, alert_ids = notices.setdefault(int(alerts['channel_id'][i]), ([], []))
+            lines.append(
+                f"🔔 <@{alerts['user_id'][i]}> **{ticker}** is {condition} ${alerts['threshold'][i]:.2f} (now ${prices[ticker]:.2f})\n"
+            )
+            alert_ids.append(int(alerts['id'][i]))
+
+        # channels have separate rate limits, so notify them concurrently
+        channel_ids = list(notices)
+        results = await asyncio.gather(
+            *(self._notify_channel(channel_id, notices[channel_id][0]) for channel_id in channel_ids),
+            return_exceptions=True
+        )
+
+        # alerts are one-shot: remove the delivered ones and those whose channel is gone,
+        # keep the rest for the next tick (ticks never overlap, so nothing fires twice at once)
+        done = []
+        for channel_id, result in zip(channel_ids, results):
+            if isinstance(result, (discord.NotFound, discord.Forbidden)):
+                log.info("dropping price alerts for unreachable channel", extra={'channel_id': channel_id, 'error': repr(result)})
+            elif isinstance(result, Exception):
+                log.warning("price alert delivery failed", extra={'channel_id': channel_id, 'error': repr(result)})
+                continue
+            done += notices[channel_id][1]
+        if done:
+            alert_store.remove(done)
+
+    @alert_checker.before_loop
+    async def before_alert_checker(self):
+        # the channel cache is empty until the first READY
+        await self.bot.wait_until_ready()
+
+    async def _notify_channel(self, channel_id: int, lines: list[str]):
+        # uncached isn't gone (DMs, threads, before a re-identify finishes), so ask Discord;
+        # fetch_channel raises NotFound or Forbidden if it really is
+        channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+        for content in generate_response_list(lines, MESSAGE_CONTENT_LIMIT):
+            await channel.send(content, allowed_mentions=discord.AllowedMentions(users=True))
+
+    async def _send_quotes(self, interaction: discord.Interaction, ticker_list: list[str], period: str,
+                           chart: bool = False, title: str = None):
+        """Batched quote table (and optional small-multiples chart) for /stocks and /watchlist"""
+        try:
+            quotes = await get_quotes(ticker_list, period)
+        except UpstreamTimeoutError:
+            await interaction.followup.send(f"⏱️ Timed out getting data for: **{', '.join(ticker_list)}**")
+            return
+        except Exception:
+            # answer the deferred interaction whatever went wrong, or it spins forever
+            log.exception("quotes failed", extra={'tickers': ticker_list, 'period': period})
+            quotes = None
+
+        if quotes is None or quotes.empty:
+            await interaction.followup.send(f"❌ Could not find data for: **{', '.join(ticker_list)}**")
+            return
+
+        # monospace table so the columns line up
+        rows = [f"{'':2}{'TICKER':<7}{'PRICE':>10}{'CHANGE':>10}{'%':>9}"]
+        for ticker, quote in quotes.iterrows():
+            arrow = "🟢" if quote['change'] >= 0 else "🔴"
+            rows.append(f"{arrow}{ticker:<7}{quote['price']:>10.2f}{quote['change']:>+10.2f}{quote['change_pct']:>+8.2f}%")
+
+        gainers = int((quotes['change'] >= 0).sum())
+        embed = discord.Embed(
+            title=f"📊 {title or f'{len(quotes)} stocks'} - {PERIOD_TO_TEXT[period]}",
+            description="```\n" + "\n".join(rows) + "\n```",
+            color=0x00ff00 if gainers * 2 >= len(quotes) else 0xff0000
+        )
+
+        missing = [ticker for ticker in ticker_list if ticker not in quotes.index]
+        if missing:
+            embed.set_footer(text=f"No data for: {', '.join(missing)}")
+
+        chart_file = None
+        if chart:
+            chart_file = await create_quotes_chart(list(quotes.index), period)
+
+        if chart_file:
+            embed.set_image(url="attachment://quotes_chart.png")
+            with metrics.phase('send'):
+                await interaction.followup.send(embed=embed, file=chart_file)
+        else:
+            with metrics.phase('send'):
+                await interaction.followup.send(embed=embed)
+
     @app_commands.command(name='stock', description='Get stock information and chart')
     @app_commands.describe(
         ticker='Stock symbol (e.g., AAPL, TSLA, GOOGL)',
@@ -20,21 +207,24 @@ class Stocks(commands.Cog):
         
         ticker = ticker.upper()
 
-        valid_periods = ["1d", "5d", "1m", "3m", "6m", "1y", "5y"]
-        if period not in valid_periods:
-            await interaction.followup.send(f"❌ Invalid period. Choose from: {', '.join(valid_periods)}")
+        if period not in VALID_PERIODS:
+            await interaction.followup.send(f"❌ Invalid period. Choose from: {', '.join(VALID_PERIODS)}")
             return
         
-        # convert m back to mo for months for API use
-        # originally set to use "m" for months for user consistency (even though m = minutes)
-
-        if period[1] == "m":
-            # add in "o" to make "mo" for months
-            period += "o"
-        
+        period = api_period(period)
         
+        # info and chart share one set of upstream fetches
+        snapshot = new_stock_snapshot(ticker, period)
+
         # get stock info
-        stock_data = get_stock_info(ticker, period)
+        try:
+            stock_data = await get_stock_info(ticker, period, snapshot)
+        except UpstreamTimeoutError:
+            await interaction.followup.send(f"⏱️ Timed out getting data for ticker: **{ticker}**")
+            return
+        except Exception:
+            log.exception("stock info failed", extra={'ticker': ticker, 'period': period})
+            stock_data = None
         
         if not stock_data:
             await interaction.followup.send(f"❌ Could not find data for ticker: **{ticker}**")
@@ -50,16 +240,6 @@ class Stocks(commands.Cog):
             color = 0xff0000
             arrow_icon = "⬇️"
 
-        period_to_text = {
-            "1d" : "today",
-            "5d" : "past 5 days",
-            "1mo" : "past month",
-            "3mo" : "past 3 months",
-            "6mo" : "past 6 months",
-            "1y" : "past year",
-            "5y" : "past 5 years"
-        }
-
         description = ""
         # adds prepost data if exists
         if 'prepost_label' in stock_data:
@@ -68,7 +248,7 @@ class Stocks(commands.Cog):
 
 
         embed = discord.Embed(
-            title=f"📈 {ticker} - {stock_data['name']}\n${stock_data['current_price']:.2f}\n{stock_data['change']:+.2f} ({stock_data['change_pct']:+.2f}%) {arrow_icon} {period_to_text[period]}",
+            title=f"📈 {ticker} - {stock_data['name']}\n${stock_data['current_price']:.2f}\n{stock_data['change']:+.2f} ({stock_data['change_pct']:+.2f}%) {arrow_icon} {PERIOD_TO_TEXT[period]}",
             description=description,
             color=color
         )
@@ -114,15 +294,190 @@ class Stocks(commands.Cog):
             inline=True
         )
         
-        # create chart
-        chart_file = create_stock_chart(ticker, period)
+        # create chart, None if it couldn't be made
+        chart_file = await create_stock_chart(ticker, period, snapshot)
         
         if chart_file:
             embed.set_image(url=f"attachment://{ticker}_chart.png")
-            await interaction.followup.send(embed=embed, file=chart_file)
+            with metrics.phase('send'):
+                await interaction.followup.send(embed=embed, file=chart_file)
         else:
-            await interaction.followup.send(embed=embed)
+            with metrics.phase('send'):
+                await interaction.followup.send(embed=embed)
     
+    @app_commands.command(name='stocks', description='Compare several stocks at once')
+    @app_commands.describe(
+        tickers='Stock symbols separated by spaces or commas (e.g., AAPL MSFT NVDA)',
+        period='Time period to measure change over',
+        chart='Include a small chart for each ticker'
+    )
+    async def stocks(self, interaction: discord.Interaction, tickers: str, period: str = "1d", chart: bool = False):
+        await interaction.response.defer()
+
+        ticker_list = parse_tickers(tickers)
+        if not ticker_list:
+            await interaction.followup.send("❌ Give at least one ticker, e.g. `AAPL MSFT NVDA`")
+            return
+        if len(ticker_list) > MAX_BATCH_TICKERS:
+            await interaction.followup.send(f"❌ Up to {MAX_BATCH_TICKERS} tickers at a time.")
+            return
+
+        if period not in VALID_PERIODS:
+            await interaction.followup.send(f"❌ Invalid period. Choose from: {', '.join(VALID_PERIODS)}")
+            return
+        period = api_period(period)
+
+        await self._send_quotes(interaction, ticker_list, period, chart)
+
+    async def _watchlist_owner(self, interaction: discord.Interaction, scope: str, editing: bool = False):
+        # user id or guild id the watchlist belongs to, None (after replying) if not allowed
+        if scope == 'user':
+            return interaction.user.id
+
+        if interaction.guild_id is None:
+            await interaction.response.send_message("Server watchlists only work inside a server.", ephemeral=True)
+            return None
+        if editing and not interaction.permissions.manage_guild:
+            await interaction.response.send_message("You need the Manage Server permission to change the server watchlist.", ephemeral=True)
+            return None
+        return interaction.guild_id
+
+    @watchlist.command(name='add', description='Add tickers to a watchlist')
+    @app_commands.describe(
+        tickers='Stock symbols separated by spaces or commas',
+        scope='Your own watchlist or the server\'s'
+    )
+    @app_commands.choices(scope=[
+        app_commands.Choice(name='me', value='user'),
+        app_commands.Choice(name='server', value='guild')
+    ])
+    async def watchlist_add(self, interaction: discord.Interaction, tickers: str, scope: str = 'user'):
+        owner_id = await self._watchlist_owner(interaction, scope, editing=True)
+        if owner_id is None:
+            return
+
+        ticker_list = parse_tickers(tickers)
+        added = watchlist_store.add(scope, owner_id, ticker_list)
+        if added:
+            message = f"👀 Added {', '.join(added)} to the watchlist."
+        else:
+            message = "Nothing added, those tickers are already on the watchlist."
+        # tickers left out because the list is full, not because they were already on it
+        if len(added) < len(ticker_list) and len(watchlist_store.get(scope, owner_id)) >= watchlist_store.max_tickers:
+            message += f" Watchlists hold up to {watchlist_store.max_tickers} tickers."
+        await interaction.response.send_message(message, ephemeral=scope == 'user')
+
+    @watchlist.command(name='remove', description='Remove tickers from a watchlist')
+    @app_commands.describe(
+        tickers='Stock symbols separated by spaces or commas',
+        scope='Your own watchlist or the server\'s'
+    )
+    @app_commands.choices(scope=[
+        app_commands.Choice(name='me', value='user'),
+        app_commands.Choice(name='server', value='guild')
+    ])
+    async def watchlist_remove(self, interaction: discord.Interaction, tickers: str, scope: str = 'user'):
+        owner_id = await self._watchlist_owner(interaction, scope, editing=True)
+        if owner_id is None:
+            return
+
+        removed = watchlist_store.remove(scope, owner_id, parse_tickers(tickers))
+        if removed:
+            message = f"🗑️ Removed {', '.join(removed)} from the watchlist."
+        else:
+            message = "Nothing removed, those tickers aren't on the watchlist."
+        await interaction.response.send_message(message, ephemeral=scope == 'user')
+
+    @watchlist.command(name='show', description='Quotes for every ticker on a watchlist')
+    @app_commands.describe(
+        scope='Your own watchlist or the server\'s',
+        period='Time period to measure change over',
+        chart='Include a small chart for each ticker'
+    )
+    @app_commands.choices(scope=[
+        app_commands.Choice(name='me', value='user'),
+        app_commands.Choice(name='server', value='guild')
+    ])
+    async def watchlist_show(self, interaction: discord.Interaction, scope: str = 'user', period: str = "1d", chart: bool = False):
+        owner_id = await self._watchlist_owner(interaction, scope)
+        if owner_id is None:
+            return
+
+        ticker_list = watchlist_store.get(scope, owner_id)
+        if not ticker_list:
+            await interaction.response.send_message("This watchlist is empty, add tickers with `/watchlist add`.", ephemeral=True)
+            return
+
+        if period not in VALID_PERIODS:
+            await interaction.response.send_message(f"❌ Invalid period. Choose from: {', '.join(VALID_PERIODS)}", ephemeral=True)
+            return
+
+        await interaction.response.defer()
+        title = "Your watchlist" if scope == 'user' else "Server watchlist"
+        await self._send_quotes(interaction, ticker_list, api_period(period), chart, title)
+
+    @app_commands.command(name='alert', description='Get pinged when a stock crosses a price')
+    @app_commands.describe(
+        ticker='Stock symbol (e.g., AAPL)',
+        condition='Alert when the price goes above or below the target',
+        price='Target price in USD'
+    )
+    @app_commands.choices(condition=[
+        app_commands.Choice(name='above', value='above'),
+        app_commands.Choice(name='below', value='below')
+    ])
+    async def alert(self, interaction: discord.Interaction, ticker: str, condition: str, price: float):
+        await interaction.response.defer(ephemeral=True)
+        ticker = ticker.upper()
+
+        if price <= 0:
+            await interaction.followup.send("❌ The target price has to be above $0.")
+            return
+
+        try:
+            prices = await get_latest_prices([ticker])
+        except UpstreamTimeoutError:
+            await interaction.followup.send(f"⏱️ Timed out getting data for ticker: **{ticker}**")
+            return
+        except Exception:
+            log.exception("alert price lookup failed", extra={'ticker': ticker})
+            prices = {}
+
+        if ticker not in prices:
+            await interaction.followup.send(f"❌ Could not find data for ticker: **{ticker}**")
+            return
+
+        alert_id = alert_store.add(interaction.user.id, interaction.channel_id, ticker, condition, price)
+        if alert_id is None:
+            await interaction.followup.send(f"❌ You already have {alert_store.max_per_user} alerts, cancel one with `/alerts cancel`.")
+            return
+
+        await interaction.followup.send(
+            f"🔔 Alert #{alert_id} set: **{ticker}** {condition} ${price:.2f} (now ${prices[ticker]:.2f}). "
+            f"You'll be pinged in this channel."
+        )
+
+    @app_commands.command(name='alerts', description='List or cancel your price alerts')
+    @app_commands.describe(cancel='Alert number to cancel')
+    async def alerts(self, interaction: discord.Interaction, cancel: int = None):
+        if cancel is not None:
+            if alert_store.remove([cancel], user_id=interaction.user.id):
+                message = f"🗑️ Alert #{cancel} cancelled."
+            else:
+                message = f"❌ You have no alert #{cancel}."
+            await interaction.response.send_message(message, ephemeral=True)
+            return
+
+        user_alerts = alert_store.for_user(interaction.user.id)
+        if not user_alerts:
+            await interaction.response.send_message("You have no price alerts, set one with `/alert`.", ephemeral=True)
+            return
+
+        lines = [f"#{alert_id} **{ticker}** {condition} ${threshold:.2f}" for alert_id, ticker, condition, threshold in user_alerts]
+        await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
+    @watchlist_show.autocomplete('period')
+    @stocks.autocomplete('period')
     @stock.autocomplete('period')
     async def period_autocomplete(self, interaction: discord.Interaction, current: str):
         periods = [
@@ -1,43 +1,105 @@
+from utils import startup  # first, so the startup clock begins as early as possible
+import asyncio
+import logging
 from dotenv import load_dotenv
-from discord import Intents, Message
+from discord import Intents, Message, Interaction, InteractionType, app_commands
 from discord.ext import commands
 import os
+from utils.command_sync import sync_commands
+from utils.logs import setup_logging
+from utils import metrics
 
 load_dotenv()
 TOKEN = os.getenv('TOKEN')
+WARM_UP = os.getenv('WARM_UP', '1') == '1'
 
-intents = Intents.default()
-intents.message_content = True
-bot = commands.Bot(command_prefix='/', intents=intents)
+COGS = ['cogs.sports', 'cogs.llm', 'cogs.general', 'cogs.stocks']
 
-@bot.event
-async def on_ready() -> None:
-    print(f'{bot.user} is now running!')
-    
-    # load all cogs
-    await bot.load_extension('cogs.sports')
-    await bot.load_extension('cogs.llm')
-    await bot.load_extension('cogs.general')
-    await bot.load_extension('cogs.stocks')
+log = logging.getLogger(__name__)
+# one record per message seen, sampled by utils.logs
+message_log = logging.getLogger('omni.messages')
 
-    await bot.tree.sync()
-    print('Commands synced!')
+startup.mark('imports done')
 
-@bot.event
-async def on_message(message: Message) -> None:
-    if message.author == bot.user:
-        return
+class OmniTree(app_commands.CommandTree):
+    # times every slash command from dispatch to completion for /stats
 
-    username: str = str(message.author)
-    user_message: str = message.content
-    channel: str = str(message.channel)
+    async def interaction_check(self, interaction: Interaction) -> bool:
+        # runs in the same task as the command, so its phases land on this timer
+        if interaction.type is InteractionType.application_command and interaction.command is not None:
+            interaction.extras['timer'] = metrics.start_command(interaction.command.qualified_name)
+        return True
 
-    print(f'[{channel}] {username}: "{user_message}"')
-    
-    await bot.process_commands(message)
+    async def on_error(self, interaction: Interaction, error: app_commands.AppCommandError) -> None:
+        metrics.finish_command(interaction.extras.get('timer'), failed=True)
+        await super().on_error(interaction, error)
+
+class OmniBot(commands.Bot):
+    warm_up_task = None
+
+    async def setup_hook(self) -> None:
+        # runs once before connecting to the gateway, unlike on_ready
+        # which fires again after every reconnect
+        await self.load_cogs()
+
+        with startup.phase('command sync'):
+            synced = await sync_commands(self.tree, self.application_id)
+        log.info("commands synced" if synced else "commands unchanged, skipped sync")
+
+        if await metrics.start_server():
+            log.info("metrics endpoint running", extra={'host': metrics.METRICS_HOST, 'port': metrics.METRICS_PORT})
+
+    async def on_ready(self) -> None:
+        log.info("bot ready", extra={'user': str(self.user), 'guilds': len(self.guilds)})
+
+        # only the first ready counts, later ones are reconnects
+        if not startup.is_marked('ready'):
+            startup.mark('ready')
+            if WARM_UP:
+                # load heavy dependencies and start chart workers before the first command needs them
+                # (imported here so spawned chart workers re-running this module skip it)
+                from utils.data_access import warm_up
+                self.warm_up_task = asyncio.create_task(warm_up())
+
+    async def on_app_command_completion(self, interaction: Interaction, command) -> None:
+        metrics.finish_command(interaction.extras.get('timer'))
+
+    async def on_message(self, message: Message) -> None:
+        if message.author == self.user:
+            return
+
+        # metadata only, message content is never logged
+        if message_log.isEnabledFor(logging.INFO):
+            message_log.info("message", extra={
+                'channel_id': message.channel.id,
+                'author_id': message.author.id,
+                'chars': len(message.content)
+            })
+
+        await self.process_commands(message)
+
+    async def close(self) -> None:
+        await metrics.stop_server()
+        await super().close()
+
+    async def load_cogs(self) -> None:
+        # safe to call again, cogs that are already loaded are left alone
+        for cog in COGS:
+            if cog in self.extensions:
+                continue
+            with startup.phase(f'load {cog}'):
+                await self.load_extension(cog)
 
 def main() -> None:
-    bot.run(TOKEN)
+    # set up here rather than at import, spawned chart workers re-import this module
+    setup_logging()
+
+    intents = Intents.default()
+    intents.message_content = True
+    bot = OmniBot(command_prefix='/', intents=intents, tree_cls=OmniTree)
+
+    # logging is already configured, keep discord.py from adding its own handler
+    bot.run(TOKEN, log_handler=None)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
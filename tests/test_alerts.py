@@ -0,0 +1,50 @@
+import pytest
+from utils.alerts import AlertStore, triggered
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AlertStore(str(tmp_path / 'alerts.db'), max_per_user=3)
+
+
+def test_add_caps_alerts_per_user(store):
+    ids = [store.add(1, 10, 'AAPL', 'above', 200.0 + i) for i in range(3)]
+    assert None not in ids
+    assert store.add(1, 10, 'AAPL', 'above', 300.0) is None
+    # other users have their own allowance
+    assert store.add(2, 10, 'AAPL', 'above', 300.0) is not None
+    assert [row[0] for row in store.for_user(1)] == ids
+
+
+def test_remove_only_touches_the_users_own_alerts(store):
+    alert_id = store.add(1, 10, 'AAPL', 'above', 200.0)
+    assert store.remove([alert_id], user_id=2) == 0
+    assert store.remove([alert_id], user_id=1) == 1
+    assert store.for_user(1) == []
+
+
+def test_arrays_are_rebuilt_after_changes(store):
+    assert len(store.arrays()['id']) == 0
+    store.add(1, 10, 'AAPL', 'above', 200.0)
+    first = store.arrays()
+    assert store.arrays() is first
+    store.add(1, 10, 'MSFT', 'below', 400.0)
+    assert list(store.arrays()['ticker']) == ['AAPL', 'MSFT']
+
+
+def test_triggered_checks_every_condition_at_once(store):
+    store.add(1, 10, 'AAPL', 'above', 200.0)
+    store.add(1, 10, 'AAPL', 'below', 150.0)
+    store.add(2, 10, 'MSFT', 'below', 400.0)
+    store.add(2, 10, 'NVDA', 'above', 100.0)
+
+    hit = triggered(store.arrays(), {'AAPL': 200.0, 'MSFT': 410.0})
+    # AAPL reaching the threshold exactly counts, NVDA has no price so never fires
+    assert hit.tolist() == [True, False, False, False]
+
+    hit = triggered(store.arrays(), {'AAPL': 149.5, 'MSFT': 399.0, 'NVDA': 100.01})
+    assert hit.tolist() == [False, True, True, True]
+
+
+def test_triggered_with_no_alerts(store):
+    assert triggered(store.arrays(), {'AAPL': 1.0}).tolist() == []
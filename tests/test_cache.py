@@ -0,0 +1,166 @@
+import asyncio
+import pytest
+from utils import cache
+from utils.cache import TTLCache, RefreshingStore
+
+
+class FakeClock:
+    """Stands in for the time module so expiry doesn't depend on sleeping"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache, 'time', clock)
+    return clock
+
+
+def test_ttl_cache_expires_entries(clock):
+    ttl_cache = TTLCache(ttl=30)
+    ttl_cache.set('nfl', ['line'])
+    assert ttl_cache.get('nfl') == ['line']
+
+    clock.now += 29.9
+    assert ttl_cache.get('nfl') == ['line']
+    clock.now += 0.1
+    assert ttl_cache.get('nfl') is None
+
+
+def test_ttl_cache_evicts_oldest_entry():
+    ttl_cache = TTLCache(ttl=30, max_entries=2)
+    ttl_cache.set('a', 1)
+    ttl_cache.set('b', 2)
+    # setting again moves a key to the back
+    ttl_cache.set('a', 1)
+    ttl_cache.set('c', 3)
+    assert ttl_cache.get('b') is None
+    assert ttl_cache.get('a') == 1
+    assert ttl_cache.get('c') == 3
+
+
+def test_ttl_cache_shares_one_fetch_between_concurrent_misses():
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def run():
+        ttl_cache = TTLCache(ttl=30)
+        results = await asyncio.gather(*(ttl_cache.get_or_fetch('nba', fetch) for _ in range(5)))
+        cached = await ttl_cache.get_or_fetch('nba', fetch)
+        return ttl_cache, results, cached
+
+    ttl_cache, results, cached = asyncio.run(run())
+    assert calls == 1
+    assert results == [1] * 5
+    assert cached == 1
+    assert (ttl_cache.hits, ttl_cache.misses) == (1, 5)
+
+
+def test_ttl_cache_does_not_cache_errors():
+    attempts = 0
+
+    async def fetch():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise RuntimeError('upstream down')
+        return 'ok'
+
+    async def run():
+        ttl_cache = TTLCache(ttl=30)
+        with pytest.raises(RuntimeError):
+            await ttl_cache.get_or_fetch('mlb', fetch)
+        return await ttl_cache.get_or_fetch('mlb', fetch)
+
+    assert asyncio.run(run()) == 'ok'
+    assert attempts == 2
+
+
+def test_ttl_cache_fetch_survives_a_cancelled_caller():
+    async def fetch():
+        await asyncio.sleep(0.01)
+        return 'value'
+
+    async def run():
+        ttl_cache = TTLCache(ttl=30)
+        first = asyncio.ensure_future(ttl_cache.get_or_fetch('nfl', fetch))
+        second = asyncio.ensure_future(ttl_cache.get_or_fetch('nfl', fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second, ttl_cache.get('nfl')
+
+    assert asyncio.run(run()) == ('value', 'value')
+
+
+def test_refreshing_store_serves_stale_value_while_refreshing(clock):
+    versions = iter(range(1, 10))
+
+    async def fetch(key):
+        await asyncio.sleep(0)
+        return f'{key} v{next(versions)}'
+
+    async def run():
+        store = RefreshingStore(fetch, max_age=60)
+        first = await store.get('nba')
+
+        clock.now += 61
+        # stale: answered right away, refresh runs in the background
+        stale = await store.get('nba')
+        assert 'nba' in store._in_flight
+        await store._in_flight['nba']
+        fresh = await store.get('nba')
+        return store, first, stale, fresh
+
+    store, first, stale, fresh = asyncio.run(run())
+    assert (first, stale, fresh) == ('nba v1', 'nba v1', 'nba v2')
+    assert (store.hits, store.misses) == (2, 1)
+
+
+def test_refreshing_store_keeps_last_good_value_on_error(clock):
+    fail = False
+
+    async def fetch(key):
+        if fail:
+            raise RuntimeError('upstream down')
+        return 'good'
+
+    async def run():
+        nonlocal fail
+        store = RefreshingStore(fetch, max_age=60)
+        await store.get('nfl')
+
+        fail = True
+        clock.now += 61
+        stale = await store.get('nfl')
+        # the failed background refresh is swallowed, the value stays
+        await asyncio.gather(*store._in_flight.values(), return_exceptions=True)
+        return stale, await store.get('nfl')
+
+    assert asyncio.run(run()) == ('good', 'good')
+
+
+def test_refreshing_store_joins_running_refresh():
+    calls = 0
+
+    async def fetch(key):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def run():
+        store = RefreshingStore(fetch, max_age=60)
+        return await asyncio.gather(store.get('mlb'), store.refresh('mlb'), store.get('mlb'))
+
+    assert asyncio.run(run()) == [1, 1, 1]
+    assert calls == 1
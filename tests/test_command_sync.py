@@ -0,0 +1,70 @@
+import asyncio
+import discord
+import pytest
+from discord import app_commands
+from utils import command_sync
+from utils.command_sync import sync_commands, tree_hash
+
+
+def _tree(*names: str, description: str = 'does a thing') -> app_commands.CommandTree:
+    tree = app_commands.CommandTree(discord.Client(intents=discord.Intents.none()))
+    for name in names:
+        async def callback(interaction: discord.Interaction, ticker: str):
+            pass
+        tree.add_command(app_commands.Command(name=name, description=description, callback=callback))
+    return tree
+
+
+@pytest.fixture
+def state_path(tmp_path, monkeypatch):
+    path = tmp_path / 'command_sync.json'
+    monkeypatch.setattr(command_sync, 'COMMAND_SYNC_STATE_PATH', str(path))
+    monkeypatch.setattr(command_sync, 'DEV_GUILD_ID', None)
+    return path
+
+
+def test_tree_hash_is_stable_across_registration_order():
+    assert tree_hash(_tree('stock', 'lines', 'ask')) == tree_hash(_tree('ask', 'stock', 'lines'))
+
+
+def test_tree_hash_changes_with_the_payload():
+    base = tree_hash(_tree('stock', 'lines'))
+    assert tree_hash(_tree('stock', 'lines', 'ask')) != base
+    assert tree_hash(_tree('stock', 'lines', description='something else')) != base
+
+
+def test_sync_commands_skips_unchanged_tree(state_path, monkeypatch):
+    synced = []
+
+    async def fake_sync(self, *, guild=None):
+        synced.append(guild)
+        return []
+    monkeypatch.setattr(app_commands.CommandTree, 'sync', fake_sync)
+
+    async def run():
+        first = await sync_commands(_tree('stock'), application_id=1, force=False)
+        second = await sync_commands(_tree('stock'), application_id=1, force=False)
+        forced = await sync_commands(_tree('stock'), application_id=1, force=True)
+        changed = await sync_commands(_tree('stock', 'ask'), application_id=1, force=False)
+        return first, second, forced, changed
+
+    assert asyncio.run(run()) == (True, False, True, True)
+    assert synced == [None, None, None]
+    assert state_path.exists()
+
+
+def test_sync_state_is_kept_per_application(state_path, monkeypatch):
+    async def fake_sync(self, *, guild=None):
+        return []
+    monkeypatch.setattr(app_commands.CommandTree, 'sync', fake_sync)
+
+    async def run():
+        await sync_commands(_tree('stock'), application_id=1, force=False)
+        return await sync_commands(_tree('stock'), application_id=2, force=False)
+
+    assert asyncio.run(run()) is True
+
+
+def test_unreadable_state_means_sync(state_path):
+    state_path.write_text('{not json')
+    assert command_sync._load_state() == {}
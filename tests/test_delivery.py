@@ -0,0 +1,34 @@
+import discord
+from utils.delivery import pack_embeds, MAX_EMBEDS_PER_MESSAGE, MAX_EMBED_CHARS_PER_MESSAGE
+
+
+def _embeds(*lengths: int) -> list[discord.Embed]:
+    return [discord.Embed(description='x' * length) for length in lengths]
+
+
+def test_pack_embeds_fills_messages_up_to_the_character_budget():
+    embeds = _embeds(2950, 2950, 2950)
+    messages = pack_embeds(embeds)
+    assert [len(message) for message in messages] == [2, 1]
+    assert all(sum(len(embed) for embed in message) <= MAX_EMBED_CHARS_PER_MESSAGE for message in messages)
+
+
+def test_pack_embeds_caps_embeds_per_message():
+    messages = pack_embeds(_embeds(*[10] * 25))
+    assert [len(message) for message in messages] == [MAX_EMBEDS_PER_MESSAGE, MAX_EMBEDS_PER_MESSAGE, 5]
+
+
+def test_pack_embeds_keeps_order():
+    embeds = _embeds(4000, 100, 4000, 100)
+    messages = pack_embeds(embeds)
+    assert [embed for message in messages for embed in message] == embeds
+    assert [len(message) for message in messages] == [2, 2]
+
+
+def test_pack_embeds_counts_titles():
+    embeds = [discord.Embed(title='t' * 100, description='x' * 2950) for _ in range(2)]
+    assert len(pack_embeds(embeds)) == 2
+
+
+def test_pack_embeds_empty():
+    assert pack_embeds([]) == []
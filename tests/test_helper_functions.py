@@ -0,0 +1,86 @@
+import re
+from utils.helper_functions import FENCE, generate_response_list, split_markdown, split_text
+
+
+def _fences_balanced(chunk: str) -> bool:
+    return sum(1 for line in chunk.split('\n') if line.lstrip().startswith(FENCE)) % 2 == 0
+
+
+def _words(text: str) -> list[str]:
+    # the text without fences (and their language) and whitespace, which splitting adds
+    return re.sub(FENCE + r'\w*', ' ', text).split()
+
+
+def test_split_markdown_leaves_short_text_whole():
+    assert split_markdown('short answer', 100) == ('short answer', '')
+
+
+def test_split_markdown_prefers_paragraph_boundary():
+    text = 'a' * 60 + '\n\n' + 'b' * 60
+    head, tail = split_markdown(text, 100)
+    assert head == 'a' * 60 + '\n\n'
+    assert tail == 'b' * 60
+
+
+def test_split_markdown_closes_and_reopens_code_block():
+    code = '\n'.join(f'value_{i} = {i}' for i in range(40))
+    text = f"intro\n\n{FENCE}python\n{code}\n{FENCE}\n"
+    head, tail = split_markdown(text, 200)
+
+    assert len(head) <= 200
+    assert head.endswith(FENCE)
+    assert tail.startswith(f'{FENCE}python\n')
+    assert _fences_balanced(head)
+    assert _fences_balanced(tail)
+
+
+def test_split_markdown_balances_inline_spans():
+    text = 'see ' + '**' + 'bold words ' * 20 + '**'
+    head, tail = split_markdown(text, 80)
+    assert head.count('**') % 2 == 0
+    assert tail.startswith('**')
+
+
+def test_split_text_chunks_fit_and_keep_fences_balanced():
+    code = '\n'.join(f'value_{i} = compute({i})' for i in range(300))
+    text = ('word ' * 400 + '\n\n') + f"{FENCE}python\n{code}\n{FENCE}\n" + 'tail ' * 400
+    chunks = split_text(text, 500)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 500 for chunk in chunks)
+    assert all(_fences_balanced(chunk) for chunk in chunks)
+    # nothing but the added fences is lost or duplicated
+    assert _words(''.join(chunks)) == _words(text)
+
+
+def test_generate_response_list_packs_whole_blocks():
+    blocks = ['a' * 40, 'b' * 40, 'c' * 40]
+    assert generate_response_list(blocks, 100) == ['a' * 40 + 'b' * 40, 'c' * 40]
+
+
+def test_generate_response_list_splits_oversized_blocks():
+    chunks = generate_response_list(['x ' * 300], 100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert ''.join(chunks).split() == ['x'] * 300
+
+
+def test_split_markdown_makes_progress_right_after_an_opening_fence():
+    # the only boundary is the end of the fence line, splitting there used to return the same text
+    text = f'{FENCE}python\n' + 'x' * 10000
+    head, tail = split_markdown(text, 2950)
+    assert len(head) <= 2950
+    assert head.startswith(f'{FENCE}python\nxxx') and head.endswith(FENCE)
+    assert tail.startswith(f'{FENCE}python\n')
+    assert len(tail) < len(text)
+
+
+def test_split_text_handles_minified_json_blocks():
+    blob = '{' + ','.join(f'"key_{i}":[{i},{i + 1},{i + 2}]' for i in range(800)) + '}'
+    text = f'Here is the data:\n\n{FENCE}json\n{blob}\n{FENCE}\nDone.'
+    chunks = generate_response_list([text], 2950)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 2950 for chunk in chunks)
+    assert all(_fences_balanced(chunk) for chunk in chunks)
+    # the blob is hard-cut mid-word, so compare the words run together
+    assert ''.join(''.join(_words(chunk)) for chunk in chunks) == ''.join(_words(text))
@@ -0,0 +1,104 @@
+import asyncio
+import httpx
+import pytest
+from utils import http_client
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Routes every fetch to a handler the test sets, with no waiting between retries"""
+    requests = []
+    state = {'handler': None}
+
+    def transport(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return state['handler'](request, len(requests))
+
+    def get_client(host: str) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(transport))
+
+    monkeypatch.setattr(http_client, '_get_client', get_client)
+    monkeypatch.setattr(http_client, '_validators', {})
+    monkeypatch.setattr(http_client, 'BACKOFF_BASE', 0.0)
+    monkeypatch.setattr(http_client, 'BACKOFF_MAX', 0.0)
+    monkeypatch.setattr(http_client, 'HTTP_MAX_RETRIES', 2)
+
+    def serve(handler):
+        state['handler'] = handler
+        return requests
+    return serve
+
+
+def test_fetch_retries_retryable_statuses(upstream):
+    requests = upstream(lambda request, n: httpx.Response(503 if n < 3 else 200, content=b'ok'))
+    assert asyncio.run(http_client.fetch('https://example.com/markets')) == b'ok'
+    assert len(requests) == 3
+
+
+def test_fetch_raises_once_retries_are_used_up(upstream):
+    requests = upstream(lambda request, n: httpx.Response(429))
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(http_client.fetch('https://example.com/markets'))
+    assert len(requests) == 3
+
+
+def test_fetch_does_not_retry_client_errors(upstream):
+    requests = upstream(lambda request, n: httpx.Response(404))
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(http_client.fetch('https://example.com/markets'))
+    assert len(requests) == 1
+
+
+def test_fetch_retries_transport_errors(upstream):
+    def handler(request, n):
+        if n == 1:
+            raise httpx.ConnectError('refused', request=request)
+        return httpx.Response(200, content=b'ok')
+
+    requests = upstream(handler)
+    assert asyncio.run(http_client.fetch('https://example.com/markets')) == b'ok'
+    assert len(requests) == 2
+
+
+def test_conditional_fetch_reuses_body_on_304(upstream):
+    def handler(request, n):
+        if request.headers.get('If-None-Match') == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=b'page', headers={'ETag': '"v1"'})
+
+    requests = upstream(handler)
+
+    async def run():
+        first = await http_client.fetch('https://example.com/nba/injuries', conditional=True)
+        second = await http_client.fetch('https://example.com/nba/injuries', conditional=True)
+        return first, second
+
+    assert asyncio.run(run()) == (b'page', b'page')
+    assert 'If-None-Match' not in requests[0].headers
+    assert requests[1].headers['If-None-Match'] == '"v1"'
+
+
+def test_unconditional_fetch_sends_no_validators(upstream):
+    requests = upstream(lambda request, n: httpx.Response(200, content=b'page', headers={'ETag': '"v1"'}))
+
+    async def run():
+        await http_client.fetch('https://example.com/nba/injuries')
+        await http_client.fetch('https://example.com/nba/injuries')
+
+    asyncio.run(run())
+    assert all('If-None-Match' not in request.headers for request in requests)
+
+
+def test_retry_delay_honours_retry_after(monkeypatch):
+    monkeypatch.setattr(http_client, 'BACKOFF_MAX', 8.0)
+    assert http_client._retry_delay(httpx.Response(429, headers={'Retry-After': '3'}), 0) == 3.0
+    # capped so one header can't stall a command
+    assert http_client._retry_delay(httpx.Response(429, headers={'Retry-After': '120'}), 0) == 8.0
+    # a date in the past means retry now
+    past = 'Wed, 21 Oct 2015 07:28:00 GMT'
+    assert http_client._retry_delay(httpx.Response(503, headers={'Retry-After': past}), 0) == 0.0
+
+
+def test_backoff_stays_within_cap():
+    for attempt in range(10):
+        assert 0 <= http_client._backoff(attempt) <= http_client.BACKOFF_MAX
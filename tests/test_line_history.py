@@ -0,0 +1,80 @@
+from utils.line_history import LineHistory, format_movement, format_movements, MAX_POINTS_PER_EVENT
+from utils.models import Event, Market
+
+STARTS = 10_000.0
+
+
+def _event(spread: float = -3.5, home_price: float = 1.91, total: float = 45.5, live: bool = False) -> Event:
+    return Event(
+        1, 'Kansas City Chiefs', 'Buffalo Bills', STARTS, live,
+        money_line=Market(None, 1.6, 2.4),
+        spread=Market(spread, home_price, 1.91),
+        total=Market(total, 1.9, 1.9)
+    )
+
+
+def test_record_only_counts_changed_lines():
+    history = LineHistory()
+    assert history.record('nfl', [_event()], now=0) == 0
+    assert history.record('nfl', [_event()], now=60) == 0
+    assert history.record('nfl', [_event(spread=-4.5)], now=120) == 1
+    # an unchanged poll adds no row
+    assert len(history.get('nfl', 1)) == 2
+
+
+def test_record_skips_live_games_and_drops_started_ones():
+    history = LineHistory()
+    history.record('nfl', [_event(live=True)], now=0)
+    assert history.get('nfl', 1) is None
+
+    history.record('nfl', [_event()], now=0)
+    history.record('nfl', [], now=STARTS)
+    assert history.get('nfl', 1) is None
+
+
+def test_diff_compares_against_opening_or_a_point_in_time():
+    history = LineHistory()
+    history.record('nfl', [_event()], now=0)
+    history.record('nfl', [_event(spread=-4.5)], now=100)
+    history.record('nfl', [_event(spread=-4.5, total=47.0)], now=200)
+    event = history.get('nfl', 1)
+
+    assert event.diff() == {'spread_hdp': (-3.5, -4.5), 'total_points': (45.5, 47.0)}
+    assert event.diff(since=150) == {'total_points': (45.5, 47.0)}
+    assert event.diff(since=250) == {}
+
+
+def test_history_keeps_the_opening_line_when_full():
+    history = LineHistory()
+    for i in range(MAX_POINTS_PER_EVENT + 10):
+        history.record('nfl', [_event(spread=-3.5 - i * 0.5)], now=i)
+    event = history.get('nfl', 1)
+    assert len(event) == MAX_POINTS_PER_EVENT
+    assert event.diff()['spread_hdp'][0] == -3.5
+
+
+def test_movements_only_lists_moved_events():
+    history = LineHistory()
+    history.record('nfl', [_event()], now=0)
+    assert history.movements('nfl') == []
+
+    history.record('nfl', [_event(spread=-4.5)], now=100)
+    (event, diff), = history.movements('nfl')
+    assert diff == {'spread_hdp': (-3.5, -4.5)}
+
+
+def test_format_movement_shows_both_spread_handicaps():
+    history = LineHistory()
+    history.record('nfl', [_event()], now=0)
+    history.record('nfl', [_event(spread=-4.5, home_price=1.87)], now=100)
+    (event, diff), = history.movements('nfl')
+
+    output = format_movement(event, diff)
+    assert '**Spread - Home:** _-3.5 → -4.5 -109 → -114_' in output
+    assert '**Away:** _+3.5 → +4.5 -109_' in output
+    # unmoved markets aren't repeated
+    assert 'ML' not in output and 'Total' not in output
+
+
+def test_format_movements_without_history():
+    assert format_movements([]) == ["No line movement recorded yet. Check back after the lines update."]
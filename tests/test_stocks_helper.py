@@ -0,0 +1,73 @@
+import asyncio
+import pandas as pd
+import pytest
+from utils import data_access, stocks_helper
+from utils.market_data import market_cache
+
+
+class FakeTicker:
+    """Stands in for yfinance.Ticker, answering with small made-up frames"""
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+
+    @property
+    def info(self) -> dict:
+        return {'symbol': self.ticker, 'longName': 'Example Inc.', 'previousClose': 100.0}
+
+    def history(self, period: str, interval: str, prepost: bool = False, auto_adjust: bool = True):
+        index = pd.date_range('2025-01-02 14:30', periods=20, freq='30min', tz='UTC')
+        close = [100.0 + i for i in range(20)]
+        return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1000}, index=index)
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    async def render(func, *args):
+        return b'png'
+
+    monkeypatch.setattr(data_access, 'run_in_chart_pool', render)
+    market_cache.clear()
+    data_access._chart_cache.clear()
+    yield
+    market_cache.clear()
+    data_access._chart_cache.clear()
+
+
+def _snapshot(ticker: str, period: str) -> stocks_helper.MarketSnapshot:
+    snapshot = data_access.new_stock_snapshot(ticker, period)
+    snapshot.stock = FakeTicker(ticker)
+    return snapshot
+
+
+@pytest.mark.parametrize('period', ['1d', '5d', '1y'])
+@pytest.mark.parametrize('extended_hours', [False, True])
+def test_stock_request_fetches_each_upstream_call_once(period, extended_hours, monkeypatch):
+    monkeypatch.setattr(stocks_helper, 'is_extended_hours', lambda: extended_hours)
+    snapshot = _snapshot('AAPL', period)
+
+    async def run():
+        info = await data_access.get_stock_info('AAPL', period, snapshot)
+        chart = await data_access.create_stock_chart('AAPL', period, snapshot)
+        return info, chart
+
+    info, chart = asyncio.run(run())
+    assert info is not None and chart is not None
+    # one info call and one call per history frame, whatever both paths read
+    assert snapshot.fetched.count('info') == 1
+    history_calls = [call for call in snapshot.fetched if call != 'info']
+    assert len(history_calls) == len(set(history_calls)) == len(snapshot._history)
+
+
+def test_second_request_reads_from_the_market_cache(monkeypatch):
+    monkeypatch.setattr(stocks_helper, 'is_extended_hours', lambda: False)
+
+    async def run():
+        for snapshot in (first, second):
+            await data_access.get_stock_info('AAPL', '1d', snapshot)
+            await data_access.create_stock_chart('AAPL', '1d', snapshot)
+
+    first, second = _snapshot('AAPL', '1d'), _snapshot('AAPL', '1d')
+    asyncio.run(run())
+    assert first.fetched
+    assert second.fetched == []
@@ -0,0 +1,86 @@
+from utils.models import Event, Team
+from utils.team_index import TeamIndex, MAX_CHOICES, default_team_names, normalize
+
+
+def _mlb_index() -> TeamIndex:
+    return TeamIndex.from_teams('mlb', [
+        Team('Boston Red Sox'), Team('Chicago White Sox'),
+        Team('St. Louis Cardinals (M. Mikolas)'), Team('Los Angeles Dodgers')
+    ])
+
+
+def test_normalize_drops_pitchers_and_punctuation():
+    assert normalize('St. Louis Cardinals (M. Mikolas)') == 'st louis cardinals'
+
+
+def test_resolve_matches_full_name_nickname_and_abbreviation():
+    index = _mlb_index()
+    assert index.resolve('Los Angeles Dodgers') == 'Los Angeles Dodgers'
+    assert index.resolve('dodgers') == 'Los Angeles Dodgers'
+    assert index.resolve('LAD') == 'Los Angeles Dodgers'
+    assert index.resolve('stl') == 'St. Louis Cardinals'
+
+
+def test_resolve_rejects_ambiguous_and_unknown_queries():
+    index = _mlb_index()
+    # "sox" is a trailing word of both Sox teams
+    assert index.resolve('sox') is None
+    assert index.resolve('red sox') == 'Boston Red Sox'
+    assert index.resolve('yankees') is None
+    assert index.resolve('  ') is None
+
+
+def test_resolve_falls_back_to_unique_partial_match():
+    index = _mlb_index()
+    assert index.resolve('dodg') == 'Los Angeles Dodgers'
+    assert index.resolve('o') is None
+
+
+def test_abbreviations_are_per_sport():
+    # SF is the Giants in MLB and the 49ers in the NFL
+    nfl = TeamIndex.from_teams('nfl', [Team('San Francisco 49ers'), Team('New York Giants')])
+    assert nfl.resolve('sf') == 'San Francisco 49ers'
+    assert nfl.resolve('nyg') == 'New York Giants'
+
+
+def test_from_events_indexes_both_sides():
+    events = [
+        Event(1, 'Boston Celtics', 'Miami Heat', 0.0, False),
+        Event(2, 'Miami Heat', 'New York Knicks', 0.0, False)
+    ]
+    index = TeamIndex.from_events('nba', events)
+    assert index.get(index.resolve('heat')) == events
+    assert index.get(index.resolve('BOS')) == events[:1]
+    assert index.get('Unknown') == []
+
+
+def test_search_matches_names_and_abbreviations():
+    index = _mlb_index()
+    assert index.search('sox') == ['Boston Red Sox', 'Chicago White Sox']
+    assert index.search('lad') == ['Los Angeles Dodgers']
+    assert len(index.search('')) == 4
+
+
+def test_default_team_names_are_capped_for_autocomplete():
+    assert default_team_names('nba', 'lal') == ['Lakers']
+    assert len(default_team_names('nfl')) == MAX_CHOICES
+
+
+def test_games_with_different_pitchers_file_under_one_team():
+    events = [
+        Event(1, 'St. Louis Cardinals (M. Mikolas)', 'Chicago Cubs (J. Steele)', 0.0, False),
+        Event(2, 'St. Louis Cardinals (S. Gray)', 'Chicago Cubs (K. Hendricks)', 0.0, False)
+    ]
+    index = TeamIndex.from_events('mlb', events)
+    assert index.names == ['Chicago Cubs', 'St. Louis Cardinals']
+    assert index.resolve('cardinals') == 'St. Louis Cardinals'
+    assert index.resolve('STL') == 'St. Louis Cardinals'
+    assert index.get(index.resolve('cubs')) == events
+
+
+def test_resolve_takes_the_exact_autocomplete_name_first():
+    index = _mlb_index()
+    for name in index.names:
+        assert index.resolve(name) == name
+    # the name as the upstream shows it, pitcher included, still matches
+    assert index.resolve('St. Louis Cardinals (M. Mikolas)') == 'St. Louis Cardinals'
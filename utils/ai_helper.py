@@ -1,42 +1,206 @@
-from openai import OpenAI
 from dotenv import load_dotenv
+from collections import OrderedDict
+import hashlib
+import httpx
 import os
+import time
+from .helper_functions import generate_response_list
+from .startup import lazy_import
+from .db import open_db
 
 load_dotenv()
 DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
+AI_STREAMING = os.getenv('AI_STREAMING', '1') == '1'
+AI_TIMEOUT = float(os.getenv('AI_TIMEOUT', 60))
+AI_MAX_RETRIES = int(os.getenv('AI_MAX_RETRIES', 3))
+AI_MAX_CONNECTIONS = int(os.getenv('AI_MAX_CONNECTIONS', 8))
+AI_CACHE_TTL = float(os.getenv('AI_CACHE_TTL', 900))
+AI_CACHE_SIZE = int(os.getenv('AI_CACHE_SIZE', 512))
+AI_CACHE_PATH = os.getenv('AI_CACHE_PATH')     # sqlite file, in-memory only if unset
 
-client = OpenAI(api_key=DEEPSEEK_API_KEY, base_url="https://api.deepseek.com")
+# the SDK's longest wait between retries when there's no Retry-After
+AI_BACKOFF_MAX = 8.0
 
+# longest a request can take: every attempt timing out plus the longest wait between them
+# (same as http_client.FETCH_DEADLINE); callers set their own timeouts from this
+AI_DEADLINE = AI_TIMEOUT * (AI_MAX_RETRIES + 1) + AI_BACKOFF_MAX * AI_MAX_RETRIES
 
-def get_response(query: str) -> list[str]:
+MODEL = "deepseek-chat"
+SYSTEM_PROMPT = "You are a helpful assistant"
+
+_async_client = None
+
+
+def get_client():
+    # one pooled keep-alive connection set for every /ask; the SDK retries
+    # 408/409/429/5xx and connection errors with exponential backoff and Retry-After
+    # (created on first use, the openai package is slow to import)
+    global _async_client
+    if _async_client is None:
+        openai = lazy_import('openai')
+        _async_client = openai.AsyncOpenAI(
+            api_key=DEEPSEEK_API_KEY,
+            base_url="https://api.deepseek.com",
+            timeout=httpx.Timeout(AI_TIMEOUT, connect=5.0),
+            max_retries=AI_MAX_RETRIES,
+            http_client=openai.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=AI_MAX_CONNECTIONS, max_keepalive_connections=AI_MAX_CONNECTIONS)
+            )
+        )
+    return _async_client
+
+
+class ResponseCache:
+    """
+    LRU cache of finished AI responses with a TTL
+
+    Optionally backed by a SQLite file so answers survive restarts; memory
+    is checked first and disk hits are promoted back into memory.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, path: str = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()   # key: (expires_at, response)
+        self._db = None
+
+        if path:
+            self._db = open_db(
+                path, "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT, expires_at REAL)"
+            )
+            self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+
+    def get(self, key: str):
+        # returns None if missing or expired
+        entry = self._entries.get(key)
+        if entry is None and self._db is not None:
+            row = self._db.execute(
+                "SELECT expires_at, response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                entry = row
+                self._remember(key, entry)
+
+        if entry is None or entry[0] <= time.time():
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, response: str) -> None:
+        entry = (time.time() + self.ttl, response)
+        self._remember(key, entry)
+        if self._db is not None:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, response, entry[0]))
+            self._db.execute(
+                "DELETE FROM responses WHERE key NOT IN (SELECT key FROM responses ORDER BY expires_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self._db.commit()
+
+    def _remember(self, key: str, entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+response_cache = ResponseCache(AI_CACHE_TTL, AI_CACHE_SIZE, AI_CACHE_PATH)
+
+
+def cache_key(query: str) -> str:
+    # case and whitespace differences shouldn't miss the cache
+    normalized = ' '.join(query.casefold().split())
+    return hashlib.sha256(f"{MODEL}\0{SYSTEM_PROMPT}\0{normalized}".encode()).hexdigest()
+
+
+def _build_messages(query: str) -> list[dict]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": query},
+    ]
+
+
+def describe_error(e: Exception) -> str:
+    # user-facing text for a failed request, without leaking API internals
+    openai = lazy_import('openai')
+    if isinstance(e, openai.RateLimitError):
+        return "Error getting AI response: the AI service is busy, try again in a minute"
+    if isinstance(e, openai.APITimeoutError):
+        return "Error getting AI response: the request timed out"
+    if isinstance(e, openai.APIConnectionError):
+        return "Error getting AI response: could not reach the AI service"
+    if isinstance(e, openai.APIStatusError):
+        return f"Error getting AI response: the AI service returned {e.status_code}"
+    return f"Error getting AI response: {str(e)}"
+
+
+async def get_response(query: str) -> list[str]:
     """
     gets AI response using DeepSeek API
-    
+
     args:
         query: user's prompt
-        system_prompt: system message to set AI behavior
-        
+
     returns:
-        list of strings (split into chunks if > 2000 chars for Discord)
+        list of strings, split into chunks sized for Discord embeds
     """
     try:
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant"},
-                {"role": "user", "content": query},
-            ],
-            stream=False
-        )
+        key = cache_key(query)
+        full_response = response_cache.get(key)
+
+        if full_response is None:
+            response = await get_client().chat.completions.create(
+                model=MODEL,
+                messages=_build_messages(query),
+                stream=False
+            )
+
+            full_response = response.choices[0].message.content
+            response_cache.put(key, full_response)
+
+        # split on markdown-safe boundaries into embed-sized chunks
+        return generate_response_list([full_response])
 
-        full_response = response.choices[0].message.content
-        
-        # split response if it exceeds Discord's 2000 character limit
-        if len(full_response) > 2000:
-            split_response = [full_response[i:i+2000] for i in range(0, len(full_response), 2000)]
-            return split_response
-        else:
-            return [full_response]
-            
     except Exception as e:
-        return [f"Error getting AI response: {str(e)}"]
\ No newline at end of file
+        return [describe_error(e)]
+
+
+async def stream_response(query: str):
+    """
+    streams the AI response from DeepSeek as it is generated
+
+    args:
+        query: user's prompt
+
+    yields:
+        pieces of response text, in order
+    """
+    key = cache_key(query)
+    cached = response_cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    stream = await get_client().chat.completions.create(
+        model=MODEL,
+        messages=_build_messages(query),
+        stream=True
+    )
+
+    # closing the stream (e.g. on cancel) drops the connection to DeepSeek
+    pieces = []
+    async with stream:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                pieces.append(chunk.choices[0].delta.content)
+                yield pieces[-1]
+
+    # only complete answers are cached, not ones cut off by an error or cancel
+    if pieces:
+        response_cache.put(key, ''.join(pieces))
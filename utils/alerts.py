@@ -0,0 +1,125 @@
+import os
+import sqlite3
+import time
+from dotenv import load_dotenv
+from .startup import lazy_import
+from .db import open_db
+
+load_dotenv()
+ALERTS_DB_PATH = os.getenv('ALERTS_DB_PATH', 'alerts.db')
+ALERT_MAX_PER_USER = int(os.getenv('ALERT_MAX_PER_USER', 25))
+ALERT_CHECK_INTERVAL = float(os.getenv('ALERT_CHECK_INTERVAL', 60))
+
+# condition: sign applied to (price - threshold), so every alert fires on >= 0
+CONDITIONS = {
+    'above': 1.0,
+    'below': -1.0
+}
+
+
+class AlertStore:
+    """
+    One-shot price alerts kept in a SQLite file
+
+    The check loop reads every alert as column arrays, rebuilt only after an
+    alert is added or removed, so a tick is one comparison over all of them.
+    """
+
+    def __init__(self, path: str, max_per_user: int):
+        self.path = path
+        self.max_per_user = max_per_user
+        self._db = None
+        self._arrays = None     # cached column arrays, None when stale
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = open_db(
+                self.path,
+                "CREATE TABLE IF NOT EXISTS alerts ("
+                "id INTEGER PRIMARY KEY, user_id INTEGER, channel_id INTEGER, "
+                "ticker TEXT, condition TEXT, threshold REAL, created_at REAL)"
+            )
+        return self._db
+
+    def add(self, user_id: int, channel_id: int, ticker: str, condition: str, threshold: float):
+        """
+        Returns:
+            the new alert's id, or None if the user already has max_per_user alerts
+        """
+        if len(self.for_user(user_id)) >= self.max_per_user:
+            return None
+
+        db = self._connect()
+        cursor = db.execute(
+            "INSERT INTO alerts (user_id, channel_id, ticker, condition, threshold, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (user_id, channel_id, ticker, condition, threshold, time.time())
+        )
+        db.commit()
+        self._arrays = None
+        return cursor.lastrowid
+
+    def remove(self, alert_ids: list[int], user_id: int = None) -> int:
+        # user_id limits removal to that user's alerts, returns how many were removed
+        db = self._connect()
+        if user_id is None:
+            rows = [(alert_id,) for alert_id in alert_ids]
+            cursor = db.executemany("DELETE FROM alerts WHERE id = ?", rows)
+        else:
+            rows = [(alert_id, user_id) for alert_id in alert_ids]
+            cursor = db.executemany("DELETE FROM alerts WHERE id = ? AND user_id = ?", rows)
+        db.commit()
+        self._arrays = None
+        return cursor.rowcount
+
+    def for_user(self, user_id: int) -> list[tuple]:
+        # (id, ticker, condition, threshold) for each of the user's alerts, oldest first
+        return self._connect().execute(
+            "SELECT id, ticker, condition, threshold FROM alerts WHERE user_id = ? ORDER BY id",
+            (user_id,)
+        ).fetchall()
+
+    def arrays(self) -> dict:
+        """
+        Every alert as column arrays
+
+        Returns:
+            {'id', 'user_id', 'channel_id', 'ticker', 'sign', 'threshold'} numpy arrays
+        """
+        if self._arrays is None:
+            np = lazy_import('numpy')
+            rows = self._connect().execute(
+                "SELECT id, user_id, channel_id, ticker, condition, threshold FROM alerts"
+            ).fetchall()
+            ids, user_ids, channel_ids, tickers, conditions, thresholds = zip(*rows) if rows else ((),) * 6
+            self._arrays = {
+                'id': np.array(ids, dtype=np.int64),
+                'user_id': np.array(user_ids, dtype=np.int64),
+                'channel_id': np.array(channel_ids, dtype=np.int64),
+                'ticker': np.array(tickers, dtype=object),
+                'sign': np.array([CONDITIONS[condition] for condition in conditions], dtype=np.float64),
+                'threshold': np.array(thresholds, dtype=np.float64)
+            }
+        return self._arrays
+
+
+def triggered(alerts: dict, prices: dict):
+    """
+    Which alerts have been hit, evaluated for all of them at once
+
+    Args:
+        alerts: arrays from AlertStore.arrays()
+        prices: {ticker: latest price}, tickers without a price never trigger
+
+    Returns:
+        boolean numpy mask over the alerts
+    """
+    np = lazy_import('numpy')
+    # one lookup per distinct ticker, then spread back out to every alert on it
+    tickers, inverse = np.unique(alerts['ticker'].astype(str), return_inverse=True)
+    latest = np.array([prices.get(ticker, np.nan) for ticker in tickers], dtype=np.float64)
+    price = latest[inverse]
+    with np.errstate(invalid='ignore'):
+        return alerts['sign'] * (price - alerts['threshold']) >= 0
+
+
+alert_store = AlertStore(ALERTS_DB_PATH, ALERT_MAX_PER_USER)
@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+
+class TTLCache:
+    """
+    In-memory cache where entries expire after a fixed number of seconds
+
+    Concurrent misses for the same key share one in-flight fetch instead of
+    each going to the upstream.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}      # key: (expires_at, value)
+        self._in_flight = {}    # key: task fetching the value
+
+    def get(self, key):
+        # returns None if missing or expired
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, key, value) -> None:
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+        # dicts keep insertion order, so the first key is the oldest entry
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+    def invalidate(self, key) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def get_or_fetch(self, key, fetch):
+        """
+        Return the cached value for key, fetching it if needed
+
+        Args:
+            key: cache key
+            fetch: zero-argument coroutine function that produces the value
+
+        Returns:
+            cached or freshly fetched value (exceptions from fetch are not cached)
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        # joining another caller's fetch still counts as a miss, it waits on the upstream
+        self.misses += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, fetch))
+            self._in_flight[key] = task
+
+        # shield so one caller giving up doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key, fetch):
+        try:
+            value = await fetch()
+            self.set(key, value)
+            return value
+        finally:
+            self._in_flight.pop(key, None)
+
+
+class RefreshingStore:
+    """
+    Keeps the last good value per key and serves it even when stale
+
+    A stale read kicks off a background refresh and returns the old value
+    right away; only a key that has never been fetched makes the caller wait.
+    """
+
+    def __init__(self, fetch, max_age: float):
+        self.fetch = fetch          # coroutine function taking the key
+        self.max_age = max_age
+        self.hits = 0               # reads answered from memory, stale or not
+        self.misses = 0             # reads that had to wait for a fetch
+        self._values = {}           # key: (fetched_at, value)
+        self._in_flight = {}        # key: refresh task
+
+    async def get(self, key):
+        entry = self._values.get(key)
+        if entry is None:
+            self.misses += 1
+            return await self.refresh(key)
+
+        self.hits += 1
+
+        if time.monotonic() - entry[0] > self.max_age and key not in self._in_flight:
+            self._start_refresh(key)
+        return entry[1]
+
+    async def refresh(self, key):
+        """Fetch key now, joining a refresh that is already running"""
+        task = self._in_flight.get(key) or self._start_refresh(key)
+        return await asyncio.shield(task)
+
+    def _start_refresh(self, key):
+        task = asyncio.ensure_future(self._refresh(key))
+        self._in_flight[key] = task
+        # background refreshes may have no awaiter, so retrieve errors here
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def _refresh(self, key):
+        try:
+            value = await self.fetch(key)
+            self._values[key] = (time.monotonic(), value)
+            return value
+        finally:
+            self._in_flight.pop(key, None)
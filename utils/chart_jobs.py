@@ -0,0 +1,20 @@
+# picklable entry points for the chart pool
+#
+# the bot process only ever names these functions, so it never imports
+# chart_renderer (and matplotlib with it); the worker imports it on its
+# first job, or in warm_up when the pool starts
+
+
+def warm_up() -> None:
+    from . import chart_renderer
+    chart_renderer.warm_up()
+
+
+def render_stock_chart(ticker: str, period: str, hist, prev_close=None):
+    from . import chart_renderer
+    return chart_renderer.render_stock_chart(ticker, period, hist, prev_close)
+
+
+def render_small_multiples(period: str, closes):
+    from . import chart_renderer
+    return chart_renderer.render_small_multiples(period, closes)
@@ -0,0 +1,268 @@
+import io
+import logging
+import math
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.dates as mdates
+import matplotlib.style
+from matplotlib.figure import Figure
+from datetime import datetime, time
+import pytz
+import numpy as np
+
+# runs inside chart worker processes, so it only imports what plotting needs
+# and uses the Figure API instead of pyplot's global figure state
+
+_warmed_up = False
+
+log = logging.getLogger(__name__)
+
+
+def warm_up() -> None:
+    """Process pool initializer: set the theme and pay font/backend setup once"""
+    global _warmed_up
+    matplotlib.style.use('dark_background')
+    fig = Figure(figsize=(2, 1))
+    fig.subplots().plot([0, 1], [0, 1])
+    fig.savefig(io.BytesIO(), format='png')
+    _warmed_up = True
+
+
+def render_stock_chart(ticker: str, period: str, hist, prev_close=None):
+    """
+    Render a price chart to PNG bytes
+
+    Args:
+        ticker: Stock symbol (e.g., 'AAPL')
+        period: Time period (1d, 5d, 1mo, 3mo, 6mo, 1y, 5y)
+        hist: history frame from MarketSnapshot.chart_history()
+        prev_close: previous close for the reference line, if known
+
+    Returns:
+        PNG bytes or None if error
+    """
+    if not _warmed_up:
+        warm_up()
+
+    try:
+        # copy since the index is converted in place below
+        hist = hist.copy()
+        if period == "1d":
+            if hist.index.tz is None:
+                hist.index = hist.index.tz_localize('UTC')
+        eastern = pytz.timezone("US/Eastern")
+        hist.index = hist.index.tz_convert(eastern).tz_localize(None)
+
+        if hist.empty:
+            return None
+        
+        # determine color based on performance
+        price_change = hist['Close'].iloc[-1] - hist['Close'].iloc[0]
+        line_color = '#00ff00' if price_change >= 0 else '#ff0000'
+        
+        # dark theme comes from the worker's style, set once in warm_up
+        fig = Figure(figsize=(12, 6))
+        ax = fig.subplots()
+        
+        if period == "1d":
+            premarket = hist.between_time("00:00", "09:30")
+            regular_hours = hist.between_time("09:30", "16:00")  # NYSE regular
+            postmarket = hist.between_time("16:00", "23:59")
+           
+            # plot premarket
+            if not premarket.empty:
+                ax.plot(premarket.index, premarket['Close'], color="#888888",
+                        linestyle="--", linewidth=1.5)            
+                ax.fill_between(
+                    premarket.index,
+                    premarket["Close"],
+                    alpha=0.2,
+                    color="#888888"
+                )  
+            # plot regular hours
+            if not regular_hours.empty:
+                ax.plot(regular_hours.index, regular_hours['Close'], color=line_color, linewidth=2.5)
+                # fill regular hours area
+                ax.fill_between(
+                    regular_hours.index,
+                    regular_hours["Close"],
+                    alpha=0.3,
+                    color=line_color
+                )
+
+            # plot after hours in gray
+            if not postmarket.empty:
+                ax.plot(postmarket.index, postmarket['Close'], color="#888888", linewidth=1.5, linestyle='--')
+                ax.fill_between(
+                    postmarket.index,
+                    postmarket["Close"],
+                    alpha=0.2,
+                    color="#888888"
+                )
+            
+            # plot prev close line and adjust boundaries
+            if prev_close is not None:
+                ax.axhline(prev_close, color="white", alpha=0.7, linestyle="--", linewidth=1.5)
+                ax.annotate(
+                    f'Prev Close:\n${prev_close:.2f}',
+                    xy=(hist.index[-1], prev_close),
+                    xytext=(10, 10),
+                    textcoords='offset points',
+                    bbox=dict(boxstyle="round,pad=0.3", fc="#2C2F33", alpha=0.7),
+                    color="white",
+                    fontsize=12,
+                    fontweight='bold'
+                )
+
+                ymin = min(hist['Close'].min(), prev_close)
+                ymax = max(hist['Close'].max(), prev_close)    
+            else:
+                ymin = hist['Close'].min()
+                ymax = hist['Close'].max()
+
+            padding = (ymax - ymin) * 0.05  # 5% margin
+            ax.set_ylim(ymin - padding, ymax + padding)
+            
+            # format x-axis for 1d
+            ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
+            current_date = datetime.now(pytz.timezone("US/Eastern")).strftime("%b %d")
+            ax.set_xlabel(current_date, fontsize=12)
+
+            # extend x-axis to 8pm even if theres no data yet
+            trading_day = hist.index[-1].date()
+            forced_end = eastern.localize(datetime.combine(trading_day, time(20, 0)))
+            forced_end = forced_end.replace(tzinfo=None)
+            
+            ax.set_xlim(hist.index[0], forced_end)
+            ax.margins(x=0)
+            
+            # add current price annotation with color based on market hours
+            current_price = hist['Close'].iloc[-1]
+            current_time = hist.index[-1].time()
+            market_open = time(9, 30)
+            market_close = time(16, 0)
+
+            if current_time < market_open:
+                box_color = "#888888"
+                label_text = f'${current_price:.2f}\n(Pre-Market)'
+            elif current_time >= market_close:
+                box_color = "#888888"
+                label_text = f'${current_price:.2f}\n(After-Hours)'
+            else:
+                box_color = line_color
+                label_text = f'${current_price:.2f}'
+
+            ax.annotate(label_text, 
+                       xy=(hist.index[-1], current_price),
+                       xytext=(10, 10), textcoords='offset points',
+                       bbox=dict(boxstyle='round,pad=0.5', fc=box_color, alpha=0.7),
+                       fontsize=12, fontweight='bold')
+        
+        else:
+            # For multi-day: remove gaps by using integer index
+            actual_dates = hist.index.copy()
+            hist_plot = hist.reset_index(drop=True)
+            
+            # plot with integer index (no gaps)
+            ax.plot(hist_plot.index, hist_plot['Close'], linewidth=2.5, color=line_color)
+            ax.fill_between(hist_plot.index, hist_plot["Close"], alpha=0.3, color=line_color)
+            
+            if prev_close is not None:
+                ymin = min(hist_plot['Close'].min(), prev_close)
+                ymax = max(hist_plot['Close'].max(), prev_close)    
+            else:
+                ymin = hist_plot['Close'].min()
+                ymax = hist_plot['Close'].max()
+
+            padding = (ymax - ymin) * 0.05
+            ax.set_ylim(ymin - padding, ymax + padding)
+            
+            # Set x-axis to show actual dates at intervals
+            num_ticks = min(8, len(hist_plot))
+            tick_positions = np.linspace(0, len(hist_plot)-1, num_ticks, dtype=int)
+            ax.set_xticks(tick_positions)
+            ax.set_xticklabels([actual_dates[i].strftime("%b %d") for i in tick_positions])
+            
+            ax.set_xlim(0, len(hist_plot)-1)
+            ax.margins(x=0)
+            
+            # Add current price annotation (using integer position)
+            current_price = hist_plot['Close'].iloc[-1]
+            ax.annotate(f'${current_price:.2f}', 
+                       xy=(hist_plot.index[-1], current_price),
+                       xytext=(10, 10), textcoords='offset points',
+                       bbox=dict(boxstyle='round,pad=0.5', fc=line_color, alpha=0.7),
+                       fontsize=12, fontweight='bold')
+
+        # Common formatting
+        ax.set_title(f'{ticker.upper()} Stock Price - {period.upper()}', fontsize=18, fontweight='bold', pad=20)
+        ax.set_ylabel('Price (USD)', fontsize=12)
+        ax.grid(True, alpha=0.2, linestyle='--')
+        
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
+        
+        # save to bytes buffer
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', dpi=100, bbox_inches='tight', facecolor='#2C2F33')
+        return buf.getvalue()
+
+    except Exception:
+        log.exception("chart render failed", extra={'ticker': ticker, 'period': period})
+        return None
+
+
+def render_small_multiples(period: str, closes):
+    """
+    Render one small price panel per ticker to PNG bytes
+
+    Args:
+        period: Time period (1d, 5d, 1mo, 3mo, 6mo, 1y, 5y)
+        closes: frame from get_batch_chart_data, one column per ticker
+
+    Returns:
+        PNG bytes or None if error
+    """
+    if not _warmed_up:
+        warm_up()
+
+    try:
+        if closes.empty:
+            return None
+
+        cols = min(4, len(closes.columns))
+        rows = math.ceil(len(closes.columns) / cols)
+        fig = Figure(figsize=(3.5 * cols, 2.2 * rows))
+        axes = fig.subplots(rows, cols, squeeze=False).flatten()
+
+        for ax, ticker in zip(axes, closes.columns):
+            # integer x like the multi-day /stock chart, so closed hours leave no gaps
+            series = closes[ticker].dropna().reset_index(drop=True)
+            if series.empty:
+                ax.set_axis_off()
+                continue
+
+            change_pct = (series.iloc[-1] / series.iloc[0] - 1) * 100 if series.iloc[0] else 0
+            line_color = '#00ff00' if change_pct >= 0 else '#ff0000'
+            ax.plot(series.index, series, color=line_color, linewidth=1.5)
+            ax.fill_between(series.index, series, series.min(), alpha=0.2, color=line_color)
+            ax.set_title(f'{ticker}  ${series.iloc[-1]:.2f}  {change_pct:+.2f}%', fontsize=10, fontweight='bold')
+            ax.set_xlim(0, max(len(series) - 1, 1))
+            ax.set_xticks([])
+            ax.tick_params(axis='y', labelsize=8)
+            ax.grid(True, alpha=0.2, linestyle='--')
+
+        # hide the unused panels in the last row
+        for ax in axes[len(closes.columns):]:
+            ax.set_axis_off()
+
+        fig.suptitle(f'{period.upper()}', fontsize=12, fontweight='bold')
+        fig.tight_layout()
+
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', dpi=100, bbox_inches='tight', facecolor='#2C2F33')
+        return buf.getvalue()
+
+    except Exception:
+        log.exception("chart render failed", extra={'tickers': list(closes.columns), 'period': period})
+        return None
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+from dotenv import load_dotenv
+import discord
+from discord import app_commands
+
+load_dotenv()
+COMMAND_SYNC_STATE_PATH = os.getenv('COMMAND_SYNC_STATE_PATH', '.command_sync.json')
+DEV_GUILD_ID = os.getenv('DEV_GUILD_ID')     # sync to this guild only (updates instantly) instead of globally
+FORCE_COMMAND_SYNC = os.getenv('FORCE_COMMAND_SYNC', '0') == '1'
+
+
+def _load_state() -> dict:
+    try:
+        with open(COMMAND_SYNC_STATE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # missing or unreadable state just means the next sync goes through
+        return {}
+
+
+def _save_state(state: dict) -> None:
+    # write then rename so a crash mid-write can't leave a half-written file
+    tmp_path = f"{COMMAND_SYNC_STATE_PATH}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, COMMAND_SYNC_STATE_PATH)
+
+
+def tree_hash(tree: app_commands.CommandTree, guild: discord.abc.Snowflake = None) -> str:
+    # hash of the exact payload tree.sync would upload for this scope
+    payload = [command.to_dict(tree) for command in tree.get_commands(guild=guild)]
+    payload.sort(key=lambda command: (command.get('type', 1), command['name']))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+async def sync_commands(tree: app_commands.CommandTree, application_id: int, force: bool = FORCE_COMMAND_SYNC) -> bool:
+    """
+    Sync the command tree only if it changed since the last sync
+
+    Syncs globally, or only to DEV_GUILD_ID when that is set. The hash of the
+    last synced payload is kept per application and scope in
+    COMMAND_SYNC_STATE_PATH.
+
+    Returns:
+        True if commands were uploaded, False if Discord already had them
+    """
+    guild = None
+    scope = 'global'
+    if DEV_GUILD_ID:
+        guild = discord.Object(id=int(DEV_GUILD_ID))
+        scope = f'guild:{DEV_GUILD_ID}'
+        tree.copy_global_to(guild=guild)
+
+    key = f'{application_id}:{scope}'
+    digest = tree_hash(tree, guild)
+    state = _load_state()
+    if not force and state.get(key) == digest:
+        return False
+
+    await tree.sync(guild=guild)
+    state[key] = digest
+    _save_state(state)
+    return True
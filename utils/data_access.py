@@ -0,0 +1,437 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import sys
+import discord
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from dotenv import load_dotenv
+from . import lines, injuries, stocks_helper, ai_helper, chart_jobs, http_client
+from .line_history import line_history, format_movements
+from .cache import TTLCache, RefreshingStore
+from .team_index import TeamIndex, default_team_names, team_name
+from . import startup, metrics
+from .market_data import market_cache
+from .startup import lazy_import
+
+load_dotenv()
+MAX_WORKERS = int(os.getenv('DATA_ACCESS_WORKERS', 16))
+LINES_CACHE_TTL = float(os.getenv('LINES_CACHE_TTL', 30))
+INJURY_REFRESH_INTERVAL = float(os.getenv('INJURY_REFRESH_INTERVAL', 900))
+INJURY_REFRESH_JITTER = float(os.getenv('INJURY_REFRESH_JITTER', 60))
+LINES_POLL_INTERVAL = float(os.getenv('LINES_POLL_INTERVAL', 60))
+CHART_WORKERS = int(os.getenv('CHART_WORKERS', 2))
+CHART_CACHE_TTL = float(os.getenv('CHART_CACHE_TTL', 60))
+WATCHLIST_PREFETCH_INTERVAL = float(os.getenv('WATCHLIST_PREFETCH_INTERVAL', 60))
+WATCHLIST_PREFETCH_CLOSED_INTERVAL = float(os.getenv('WATCHLIST_PREFETCH_CLOSED_INTERVAL', 1800))
+WATCHLIST_PREFETCH_MAX = int(os.getenv('WATCHLIST_PREFETCH_MAX', 100))
+
+# upstream: [max concurrent calls, timeout in seconds]
+# (the http and DeepSeek upstreams wait out their clients' own retries, with a second to spare)
+UPSTREAM_LIMITS = {
+    'rapidapi': [4, http_client.FETCH_DEADLINE + 1],
+    'espn': [4, http_client.FETCH_DEADLINE + 1],
+    'yahoo': [6, 20],
+    'chart': [CHART_WORKERS, 30],
+    'deepseek': [4, ai_helper.AI_DEADLINE + 1]
+}
+
+# metrics phase each upstream's time is filed under
+UPSTREAM_PHASES = {
+    'rapidapi': 'upstream:rapidapi',
+    'espn': 'upstream:espn',
+    'yahoo': 'upstream:yahoo',
+    'chart': 'render',
+    'deepseek': 'upstream:deepseek'
+}
+
+log = logging.getLogger(__name__)
+
+# every blocking call runs here instead of on the event loop
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='data-access')
+_semaphores = {}
+
+# matplotlib rendering is CPU bound, so charts get their own processes
+# (spawned rather than forked, the bot process has live threads and sockets)
+_chart_pool = None
+_chart_cache = TTLCache(CHART_CACHE_TTL, max_entries=256)   # (ticker or tickers, period, version): PNG bytes
+
+# parsed pinnacle events per sport, and the chunks rendered from each snapshot
+_events_cache = TTLCache(LINES_CACHE_TTL)
+_rendered_lines = {}    # sport: (events, response_list)
+
+# team lookups, rebuilt only when their source snapshot is replaced
+_team_indexes = {}      # (data_type, sport): (source, TeamIndex)
+
+
+class UpstreamTimeoutError(Exception):
+    """Raised when an upstream call does not finish within its timeout"""
+
+    def __init__(self, upstream: str, timeout: float):
+        super().__init__(f"{upstream} did not respond within {timeout}s")
+        self.upstream = upstream
+        self.timeout = timeout
+
+
+def _get_semaphore(upstream: str) -> asyncio.Semaphore:
+    # created lazily so the semaphore belongs to the bot's running loop
+    if upstream not in _semaphores:
+        _semaphores[upstream] = asyncio.Semaphore(UPSTREAM_LIMITS[upstream][0])
+    return _semaphores[upstream]
+
+
+def _get_chart_pool() -> ProcessPoolExecutor:
+    global _chart_pool
+    if _chart_pool is None:
+        _chart_pool = ProcessPoolExecutor(
+            max_workers=CHART_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=chart_jobs.warm_up
+        )
+    return _chart_pool
+
+
+async def _run_in(executor, upstream: str, func, *args, **kwargs):
+    timeout = UPSTREAM_LIMITS[upstream][1]
+    loop = asyncio.get_running_loop()
+
+    async with _get_semaphore(upstream):
+        with metrics.phase(UPSTREAM_PHASES[upstream]):
+            future = loop.run_in_executor(executor, partial(func, *args, **kwargs))
+            try:
+                return await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                # the worker keeps running until the call returns,
+                # but the command gets its answer now
+                metrics.count_error(f'timeout:{upstream}')
+                raise UpstreamTimeoutError(upstream, timeout)
+
+
+async def run_blocking(upstream: str, func, *args, **kwargs):
+    """
+    Run a blocking function in the shared executor
+
+    Args:
+        upstream: key in UPSTREAM_LIMITS used for the concurrency limit and timeout
+        func: synchronous callable to run
+
+    Returns:
+        whatever func returns
+
+    Raises:
+        UpstreamTimeoutError if the call takes longer than the upstream's timeout
+    """
+    return await _run_in(_executor, upstream, func, *args, **kwargs)
+
+
+async def run_async(upstream: str, coro_func, *args, **kwargs):
+    """
+    Await a native async call under the upstream's concurrency limit and timeout
+
+    Raises:
+        UpstreamTimeoutError if the call takes longer than the upstream's timeout
+    """
+    timeout = UPSTREAM_LIMITS[upstream][1]
+
+    async with _get_semaphore(upstream):
+        with metrics.phase(UPSTREAM_PHASES[upstream]):
+            try:
+                return await asyncio.wait_for(coro_func(*args, **kwargs), timeout)
+            except asyncio.TimeoutError:
+                metrics.count_error(f'timeout:{upstream}')
+                raise UpstreamTimeoutError(upstream, timeout)
+
+
+async def run_in_chart_pool(func, *args):
+    # func and args must be picklable, they are sent to a worker process
+    return await _run_in(_get_chart_pool(), 'chart', func, *args)
+
+
+async def import_off_loop(*names: str) -> None:
+    """
+    Import modules in the executor, so a slow first import doesn't stall the event loop
+
+    Already imported modules cost nothing, so call this before code that uses lazy_import on the loop.
+    """
+    missing = [name for name in names if name not in sys.modules]
+    if missing:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(_executor, lambda: [lazy_import(name) for name in missing])
+
+
+async def warm_up() -> None:
+    """Import heavy dependencies off the event loop, then start the chart workers"""
+    try:
+        with startup.phase('warm-up (background)'):
+            await asyncio.get_running_loop().run_in_executor(_executor, startup.warm_up_imports)
+            await warm_up_chart_pool()
+    except Exception as e:
+        # commands still work, they just pay for the imports themselves
+        log.warning("warm-up failed", extra={'error': repr(e)})
+
+
+async def warm_up_chart_pool() -> None:
+    # start every worker now so the first /stock doesn't pay process startup
+    # (workers run chart_renderer.warm_up as their initializer)
+    await asyncio.gather(*(run_in_chart_pool(os.getpid) for _ in range(CHART_WORKERS)))
+
+
+def shutdown_chart_pool() -> None:
+    global _chart_pool
+    if _chart_pool is not None:
+        _chart_pool.shutdown(wait=False, cancel_futures=True)
+        _chart_pool = None
+
+
+def _chart_failed(error: Exception, **context) -> None:
+    # a missing chart never costs the command its reply, the embed goes out without one
+    if isinstance(error, UpstreamTimeoutError):
+        log.warning("chart timed out", extra={**context, 'error': repr(error)})
+        return
+    log.exception("chart failed", extra=context)
+    if isinstance(error, BrokenProcessPool):
+        # a worker died and took the pool with it, the next chart starts a fresh one
+        shutdown_chart_pool()
+
+
+async def _fetch_events(sport: str) -> list:
+    markets = await run_async('rapidapi', lines.fetch_markets, sport)
+    with metrics.phase('parse'):
+        events = lines.parse_events(markets)
+    # every real fetch feeds the movement history, cache hits don't repeat it
+    line_history.record(sport, events)
+    _team_index('lines', sport, events)
+    return events
+
+
+async def get_events(sport: str) -> list:
+    # concurrent requests for the same sport share one API call
+    return await _events_cache.get_or_fetch(sport, partial(_fetch_events, sport))
+
+
+async def get_line_movement(sport: str, team: str = None) -> list[str]:
+    # make sure the history includes the latest lines before reporting on it
+    events = await get_events(sport)
+    movements = line_history.movements(sport)
+
+    if team is not None:
+        name = _team_index('lines', sport, events).resolve(team)
+        if name is None:
+            return [_no_team_message(sport, 'lines', team)]
+        movements = [(history, diff) for history, diff in movements if name in (team_name(history.home), team_name(history.away))]
+    return format_movements(movements)
+
+
+async def get_lines(sport: str, team: str = None) -> list[str]:
+    events = await get_events(sport)
+
+    if team is not None:
+        index = _team_index('lines', sport, events)
+        name = index.resolve(team)
+        if name is None:
+            return [_no_team_message(sport, 'lines', team)]
+        # a team whose only game is live and off the board has nothing to show
+        return lines.format_lines(index.get(name)) or [_no_team_message(sport, 'lines', team)]
+
+    # only re-format when the cache handed back a new snapshot
+    rendered = _rendered_lines.get(sport)
+    if rendered is None or rendered[0] is not events:
+        rendered = (events, lines.format_lines(events))
+        _rendered_lines[sport] = rendered
+    return rendered[1]
+
+
+def _team_index(data_type: str, sport: str, source: list) -> TeamIndex:
+    indexed = _team_indexes.get((data_type, sport))
+    if indexed is None or indexed[0] is not source:
+        build = TeamIndex.from_events if data_type == 'lines' else TeamIndex.from_teams
+        indexed = (source, build(sport, source))
+        _team_indexes[(data_type, sport)] = indexed
+    return indexed[1]
+
+
+def _no_team_message(sport: str, data_type: str, team: str) -> str:
+    # covers both no match and a query (like "sox") that fits several teams
+    return f"No single {sport.upper()} team with {data_type} matches '{team}'."
+
+
+def team_names(sport: str, data_type: str, current: str = '') -> list[str]:
+    """
+    Team names for autocomplete, from the latest snapshot already in memory
+
+    Never fetches, autocomplete has to answer within Discord's 3 seconds.
+    """
+    indexed = _team_indexes.get((data_type, sport))
+    if indexed is None:
+        return default_team_names(sport, current)
+    return indexed[1].search(current)
+
+
+async def _fetch_injuries(sport: str) -> list:
+    content = await run_async('espn', injuries.fetch_injuries_page, sport)
+    # parsing the whole page is CPU heavy, keep it off the loop too
+    with metrics.phase('parse'):
+        return await run_blocking('espn', injuries.parse_injuries, content)
+
+
+# parsed injury reports per sport, refreshed in the background by the Sports cog
+# reads only trigger a refresh themselves if that loop has fallen behind
+_injuries_store = RefreshingStore(_fetch_injuries, max_age=INJURY_REFRESH_INTERVAL * 2)
+
+metrics.register_cache('lines', _events_cache)
+metrics.register_cache('injuries', _injuries_store)
+metrics.register_cache('charts', _chart_cache)
+metrics.register_cache('market data', market_cache)
+metrics.register_cache('ai answers', ai_helper.response_cache)
+
+
+async def refresh_injuries(sport: str) -> list:
+    teams = await _injuries_store.refresh(sport)
+    # build the team index now rather than on the first filtered command
+    _team_index('injuries', sport, teams)
+    return teams
+
+
+async def get_injuries(sport: str, team: str = None) -> list[str]:
+    # served from memory, possibly stale while a refresh is running
+    teams = await _injuries_store.get(sport)
+
+    if team is not None:
+        index = _team_index('injuries', sport, teams)
+        name = index.resolve(team)
+        if name is None:
+            return [_no_team_message(sport, 'injuries', team)]
+        return injuries.format_injuries(index.get(name))
+    return injuries.format_injuries(teams)
+
+
+def new_stock_snapshot(ticker: str, period: str = "1d") -> stocks_helper.MarketSnapshot:
+    # no network here, data is fetched once get_stock_info runs
+    return stocks_helper.MarketSnapshot(ticker, period)
+
+
+async def get_stock_info(ticker: str, period: str = "1d", snapshot=None):
+    return await run_blocking('yahoo', stocks_helper.get_stock_info, ticker, period, snapshot)
+
+
+async def create_stock_chart(ticker: str, period: str = "1d", snapshot=None):
+    """
+    Render a stock chart in the chart pool, reusing the PNG while the data is unchanged
+
+    Returns:
+        discord.File object or None if error
+    """
+    try:
+        chart_data = await run_blocking('yahoo', stocks_helper.get_chart_data, ticker, period, snapshot)
+        if chart_data is None:
+            return None
+
+        hist, prev_close = chart_data
+        key = (ticker, period, stocks_helper.chart_version(hist, prev_close))
+        png = await _chart_cache.get_or_fetch(
+            key, partial(run_in_chart_pool, chart_jobs.render_stock_chart, ticker, period, hist, prev_close)
+        )
+    except Exception as e:
+        _chart_failed(e, ticker=ticker, period=period)
+        return None
+
+    if png is None:
+        return None
+    return discord.File(io.BytesIO(png), filename=f'{ticker}_chart.png')
+
+
+async def get_quotes(tickers: list[str], period: str = "1d", min_ttl: float = 0):
+    # one batched download for every ticker, not a get_stock_info per ticker
+    return await run_blocking('yahoo', stocks_helper.get_quotes, tickers, period, min_ttl)
+
+
+async def get_latest_prices(tickers: list[str]) -> dict:
+    # {ticker: price} from one batched download, tickers without data are left out
+    quotes = await get_quotes(tickers)
+    return {} if quotes is None else quotes['price'].to_dict()
+
+
+async def prefetch_stocks(tickers: list[str], min_ttl: float = 0) -> int:
+    """
+    Warm the market cache with what /stock, /stocks and /watchlist read for these tickers
+
+    Args:
+        tickers: stock symbols to warm
+        min_ttl: keep every fetched entry at least this many seconds, normally
+            longer than the time until the next prefetch so nothing expires in between
+
+    Returns:
+        number of tickers that failed to prefetch
+    """
+    # quotes first, batched like /stocks
+    for start in range(0, len(tickers), stocks_helper.MAX_BATCH_TICKERS):
+        await get_quotes(tickers[start:start + stocks_helper.MAX_BATCH_TICKERS], min_ttl=min_ttl)
+
+    # then the per-ticker frames a 1d /stock needs, limited by the yahoo semaphore
+    results = await asyncio.gather(
+        *(run_blocking('yahoo', stocks_helper.MarketSnapshot(ticker, min_ttl=min_ttl).prefetch) for ticker in tickers),
+        return_exceptions=True
+    )
+    return sum(isinstance(result, Exception) for result in results)
+
+
+async def create_quotes_chart(tickers: list[str], period: str = "1d"):
+    """
+    Render a small-multiples chart for several tickers in the chart pool
+
+    Returns:
+        discord.File object or None if error
+    """
+    try:
+        closes = await run_blocking('yahoo', stocks_helper.get_batch_chart_data, tickers, period)
+        if closes is None or closes.empty:
+            return None
+
+        key = (tuple(closes.columns), period, stocks_helper.batch_chart_version(closes))
+        png = await _chart_cache.get_or_fetch(
+            key, partial(run_in_chart_pool, chart_jobs.render_small_multiples, period, closes)
+        )
+    except Exception as e:
+        _chart_failed(e, tickers=tickers, period=period)
+        return None
+
+    if png is None:
+        return None
+    return discord.File(io.BytesIO(png), filename='quotes_chart.png')
+
+
+async def get_ai_response(query: str) -> list[str]:
+    # the client and describe_error use openai on the loop
+    await import_off_loop('openai')
+    return await run_async('deepseek', ai_helper.get_response, query)
+
+
+async def stream_ai_response(query: str):
+    """
+    Stream the AI response, holding a DeepSeek slot until the stream ends
+
+    Raises:
+        UpstreamTimeoutError if no new text arrives within the upstream's timeout
+    """
+    timeout = UPSTREAM_LIMITS['deepseek'][1]
+    await import_off_loop('openai')
+
+    async with _get_semaphore('deepseek'):
+        stream = ai_helper.stream_response(query)
+        try:
+            while True:
+                # timed per piece, the time between pieces goes to editing the message
+                try:
+                    with metrics.phase(UPSTREAM_PHASES['deepseek']):
+                        text = await asyncio.wait_for(stream.__anext__(), timeout)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    metrics.count_error('timeout:deepseek')
+                    raise UpstreamTimeoutError('deepseek', timeout)
+                yield text
+        finally:
+            await stream.aclose()
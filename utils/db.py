@@ -0,0 +1,23 @@
+import sqlite3
+
+
+def open_db(path: str, *schema: str) -> sqlite3.Connection:
+    """
+    Open a SQLite file tuned for small writes from the event loop
+
+    WAL with synchronous=NORMAL keeps each commit from paying a full fsync.
+
+    Args:
+        path: database file
+        schema: statements to run once the connection is open, e.g. CREATE TABLE IF NOT EXISTS
+
+    Returns:
+        the open connection
+    """
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    for statement in schema:
+        db.execute(statement)
+    db.commit()
+    return db
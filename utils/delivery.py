@@ -0,0 +1,48 @@
+import discord
+from . import metrics
+
+# discord limits per message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+
+def pack_embeds(embeds: list[discord.Embed]) -> list[list[discord.Embed]]:
+    """
+    Group embeds into as few messages as Discord allows, keeping their order
+
+    Returns:
+        list of embed lists, one per message
+    """
+    messages = []
+    current = []
+    current_length = 0
+
+    for embed in embeds:
+        # len(embed) counts title, description, fields, footer and author text
+        length = len(embed)
+        if current and (len(current) == MAX_EMBEDS_PER_MESSAGE or current_length + length > MAX_EMBED_CHARS_PER_MESSAGE):
+            messages.append(current)
+            current = []
+            current_length = 0
+
+        current.append(embed)
+        current_length += length
+
+    if current:
+        messages.append(current)
+
+    return messages
+
+
+async def send_embeds(interaction: discord.Interaction, embeds: list[discord.Embed]) -> None:
+    # sent one message at a time so they arrive in order; discord.py waits
+    # out the webhook's rate limit bucket between them instead of retrying on 429s
+    with metrics.phase('send'):
+        for message_embeds in pack_embeds(embeds):
+            await interaction.followup.send(embeds=message_embeds)
+
+
+async def send_embeds_to_channel(channel: discord.abc.Messageable, embeds: list[discord.Embed]) -> None:
+    with metrics.phase('send'):
+        for message_embeds in pack_embeds(embeds):
+            await channel.send(embeds=message_embeds)
@@ -19,22 +19,96 @@ def format_handicap(value):
     else:
         return f"{format_with_decimal(value)}"
 
-def generate_response_list(outputs):
-    max_length = 2000
+# discord embed limits
+EMBED_DESCRIPTION_LIMIT = 4096
+MESSAGE_EMBED_LIMIT = 6000
+
+# two chunks plus short titles fill one message's 6000 character embed budget
+DEFAULT_CHUNK_LENGTH = 2950
+
+FENCE = '```'
+
+def generate_response_list(outputs, max_length=DEFAULT_CHUNK_LENGTH):
+    """
+    Pack text blocks into as few chunks of at most max_length as possible
+
+    Blocks stay whole when they fit. Blocks longer than max_length are split
+    with split_markdown. Chunks are joined from lists of parts once, so
+    packing is linear in the total text length.
+    """
     response_list = []
-    response = ''
+    parts = []
+    length = 0
+
     for output in outputs:
-        
-        if (len(response) + len(output)) > max_length:
-            if response:
-                response_list.append(response)
-            response = output
-        else:
-            response += output
-    
-    if response:
-        response_list.append(response)
+        pieces = [output] if len(output) <= max_length else split_text(output, max_length)
+        for piece in pieces:
+            if parts and length + len(piece) > max_length:
+                response_list.append(''.join(parts))
+                parts = []
+                length = 0
+            parts.append(piece)
+            length += len(piece)
+
+    if parts:
+        response_list.append(''.join(parts))
 
     return response_list
 
-        
+def split_text(text, max_length=DEFAULT_CHUNK_LENGTH):
+    # split one long text into markdown-safe chunks of at most max_length
+    chunks = []
+    while len(text) > max_length:
+        head, text = split_markdown(text, max_length)
+        chunks.append(head)
+    if text:
+        chunks.append(text)
+    return chunks
+
+def split_markdown(text, max_length):
+    """
+    Split off the longest leading part of text that fits in max_length
+
+    Prefers paragraph, then line, then word boundaries. A code block or
+    **bold**/`code` span cut by the split is closed in the first part and
+    reopened in the second, so both render properly.
+
+    Returns:
+        (head, tail) tuple
+    """
+    if len(text) <= max_length:
+        return text, ''
+
+    # leave room to close a code block or inline span
+    limit = max_length - len(FENCE) - 1
+    split = _find_split_index(text, limit)
+    head, tail = text[:split], text[split:]
+
+    # an odd number of fence lines means the split is inside a code block
+    fence_lines = [line for line in head.split('\n') if line.lstrip().startswith(FENCE)]
+    if len(fence_lines) % 2 == 1:
+        language = fence_lines[-1].lstrip()[len(FENCE):].strip()
+        # a split right after the opening fence line would hand the same text back
+        # once the fence is reopened, so cut inside the block's first line instead
+        if head.rstrip('\n').endswith(fence_lines[-1]):
+            head, tail = text[:limit], text[limit:]
+        return head.rstrip('\n') + '\n' + FENCE, f"{FENCE}{language}\n" + tail
+
+    # within a line, keep bold and inline code spans balanced
+    current_line = head[head.rfind('\n') + 1:]
+    for marker in ('**', '`'):
+        if current_line.replace(FENCE, '').count(marker) % 2 == 1:
+            head, tail = head.rstrip() + marker, marker + tail.lstrip()
+
+    return head, tail
+
+def _find_split_index(text, max_length):
+    # prefer the coarsest boundary that still fills at least half the chunk
+    best = 0
+    for separator in ('\n\n', '\n', ' '):
+        index = text.rfind(separator, 0, max_length)
+        if index >= max_length // 2:
+            return index + len(separator)
+        if index > 0:
+            best = max(best, index + len(separator))
+    return best or max_length
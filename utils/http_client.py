@@ -0,0 +1,130 @@
+import asyncio
+import os
+import random
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from dotenv import load_dotenv
+import httpx
+
+load_dotenv()
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', 10))
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 2))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv('HTTP_MAX_CONNECTIONS_PER_HOST', 8))
+
+# HTTP/2 needs the optional h2 package
+try:
+    import h2
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE = 0.5      # seconds, doubled every attempt
+BACKOFF_MAX = 8.0
+
+# longest a fetch can take: every attempt timing out plus the longest wait between them
+# (Retry-After is capped at BACKOFF_MAX too); callers set their own timeouts from this
+FETCH_DEADLINE = HTTP_TIMEOUT * (HTTP_MAX_RETRIES + 1) + BACKOFF_MAX * HTTP_MAX_RETRIES
+
+# one keep-alive pool per host so a slow host can't starve the others
+_clients = {}       # host: httpx.AsyncClient
+# validators from the last 200 response per url, for conditional requests
+_validators = {}    # url: (etag, last_modified, content)
+
+
+def _get_client(host: str) -> httpx.AsyncClient:
+    if host not in _clients:
+        _clients[host] = httpx.AsyncClient(
+            http2=HTTP2,
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+                max_keepalive_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+                keepalive_expiry=60
+            )
+        )
+    return _clients[host]
+
+
+def _backoff(attempt: int) -> float:
+    # exponential backoff with full jitter so retries don't arrive in lockstep
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    # Retry-After can be a number of seconds or an HTTP date
+    retry_after = response.headers.get('Retry-After')
+    if retry_after:
+        try:
+            return min(BACKOFF_MAX, max(0.0, float(retry_after)))
+        except ValueError:
+            try:
+                delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                return min(BACKOFF_MAX, max(0.0, delay))
+            except (TypeError, ValueError):
+                pass
+    return _backoff(attempt)
+
+
+async def fetch(url: str, params: dict = None, headers: dict = None, conditional: bool = False) -> bytes:
+    """
+    GET a url through the shared connection pools
+
+    Args:
+        url: full url to request
+        params: query string parameters
+        headers: extra request headers
+        conditional: send If-None-Match/If-Modified-Since and reuse the last body on 304
+
+    Returns:
+        response body
+
+    Raises:
+        httpx.HTTPStatusError for error responses once retries are used up
+        httpx.TransportError if the host can't be reached
+    """
+    client = _get_client(urlsplit(url).netloc)
+    request_headers = dict(headers or {})
+    cache_key = str(httpx.URL(url, params=params))
+
+    validators = _validators.get(cache_key) if conditional else None
+    if validators is not None:
+        etag, last_modified, _ = validators
+        if etag:
+            request_headers['If-None-Match'] = etag
+        if last_modified:
+            request_headers['If-Modified-Since'] = last_modified
+
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        try:
+            response = await client.get(url, params=params, headers=request_headers)
+        except httpx.TransportError:
+            if attempt == HTTP_MAX_RETRIES:
+                raise
+            await asyncio.sleep(_backoff(attempt))
+            continue
+
+        if response.status_code in RETRY_STATUSES and attempt < HTTP_MAX_RETRIES:
+            await asyncio.sleep(_retry_delay(response, attempt))
+            continue
+        break
+
+    if response.status_code == 304 and validators is not None:
+        return validators[2]
+
+    response.raise_for_status()
+
+    if conditional:
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            _validators[cache_key] = (etag, last_modified, response.content)
+
+    return response.content
+
+
+async def close() -> None:
+    for client in _clients.values():
+        await client.aclose()
+    _clients.clear()
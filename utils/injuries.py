@@ -1,67 +1,133 @@
-import requests
-from bs4 import BeautifulSoup
+import os
+from bs4 import BeautifulSoup, SoupStrainer
+from dotenv import load_dotenv
+from . import http_client
+from .models import InjuredPlayer, Team
 from .helper_functions import generate_response_list
 
-def get_injuries(sport, team=None):
-    url = f'https://www.espn.com/{sport}/injuries'
-    headers = {
+# use the fastest parser that is installed, falling back to the stdlib one
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+    DEFAULT_PARSER = 'selectolax'
+except ImportError:
+    HTMLParser = None
+    try:
+        import lxml
+        DEFAULT_PARSER = 'lxml'
+    except ImportError:
+        DEFAULT_PARSER = 'html.parser'
+
+load_dotenv()
+INJURIES_PARSER = os.getenv('INJURIES_PARSER', DEFAULT_PARSER)
+ESPN_BASE_URL = os.getenv('ESPN_BASE_URL', 'https://www.espn.com')
+
+TEAM_BLOCK_CLASS = "ResponsiveTable Table__league-injuries"
+
+# td class: InjuredPlayer field
+PLAYER_COLUMNS = {
+    'col-name': 'name',
+    'col-pos': 'position',
+    'col-date': 'return_date',
+    'col-stat': 'status',
+    'col-desc': 'comment'
+}
+
+headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/111.0.0.0 Safari/537.36"
-    }   
-    response = requests.get(url, headers=headers)
-    print(response)
+}
+
+async def fetch_injuries_page(sport):
+    url = f'{ESPN_BASE_URL}/{sport}/injuries'
+    # ESPN answers 304 when the page hasn't changed since the last refresh
+    return await http_client.fetch(url, headers=headers, conditional=True)
+
+def parse_injuries(content, parser=None):
+    """
+    Parse an ESPN injuries page into a list of Teams with their InjuredPlayers
 
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.content, 'html.parser')
+    Args:
+        content: raw page bytes or text
+        parser: 'selectolax', 'lxml' or 'html.parser' (defaults to INJURIES_PARSER)
+    """
+    parser = parser or INJURIES_PARSER
+    if parser == 'selectolax':
+        return _parse_with_selectolax(content)
+    return _parse_with_soup(content, parser)
+
+def _parse_with_soup(content, parser):
+    # only build a tree for the team tables, not the rest of the page
+    soup = BeautifulSoup(content, parser, parse_only=SoupStrainer("div", class_=TEAM_BLOCK_CLASS))
 
     all_teams_data = []
 
     # find all team blocks
-    team_blocks = soup.find_all("div", class_="ResponsiveTable Table__league-injuries")
+    team_blocks = soup.find_all("div", class_=TEAM_BLOCK_CLASS)
 
     for team_block in team_blocks:
         # extract the team name
-        team_name = team_block.find("span", class_="injuries__teamName").text.strip()
+        team_name = team_block.find("span", class_="injuries__teamName").get_text().strip()
         
         # locate the table body within this team block
         table_body = team_block.find("tbody", class_="Table__TBODY")
         rows = table_body.find_all("tr", class_="Table__TR")
         
-        # extract data for each player
+        # extract data for each player, walking each row's cells once
         players_data = []
         for row in rows:
-            name = row.find("td", class_="col-name").text.strip()
-            position = row.find("td", class_="col-pos").text.strip()
-            return_date = row.find("td", class_="col-date").text.strip()
-            status = row.find("td", class_="col-stat").text.strip()
-            comment = row.find("td", class_="col-desc").text.strip()
-            
-            players_data.append({
-                "Name": name,
-                "Position": position,
-                "Return Date": return_date,
-                "Status": status,
-                "Comment": comment
-            })
+            cells = {}
+            for td in row.find_all("td"):
+                for css_class in td.get("class", []):
+                    if css_class in PLAYER_COLUMNS:
+                        cells[css_class] = td.get_text().strip()
+
+            players_data.append(_player_from_cells(cells))
         
         # add the team and its players to the list
-        all_teams_data.append({
-            "Team": team_name,
-            "Players": players_data
-        })
+        all_teams_data.append(Team(team_name, players_data))
+
+    return all_teams_data
 
+def _parse_with_selectolax(content):
+    tree = HTMLParser(content)
+
+    all_teams_data = []
+    for team_block in tree.css("div.ResponsiveTable.Table__league-injuries"):
+        team_name = team_block.css_first("span.injuries__teamName").text().strip()
+
+        players_data = []
+        for row in team_block.css("tbody.Table__TBODY tr.Table__TR"):
+            cells = {}
+            for td in row.css("td"):
+                for css_class in (td.attributes.get("class") or "").split():
+                    if css_class in PLAYER_COLUMNS:
+                        cells[css_class] = td.text().strip()
+
+            players_data.append(_player_from_cells(cells))
+
+        all_teams_data.append(Team(team_name, players_data))
+
+    return all_teams_data
+
+def _player_from_cells(cells):
+    return InjuredPlayer(**{field: cells.get(css_class, '') for css_class, field in PLAYER_COLUMNS.items()})
+
+def format_injuries(all_teams_data, team=None):
+    # team is a team name exactly as parsed, resolve user input with a TeamIndex first
     outputs = []
-    if team == None:
-        for t in all_teams_data:
-            current_output = ''
-            current_output += f"**{t['Team']}**\n"
-            for player in t['Players']:
-                if player['Status'] == 'Day-To-Day' or player['Status'] == 'Questionable':
-                    symbol = '\U0001F7E1' # large yellow circle
-                else:
-                    symbol = '\U0001F534' # large red circle
-
-                current_output += f"{symbol} _{player['Name']} - {player['Return Date']}_\n"
-            current_output += '\n'
-            outputs.append(current_output)
-
-    return generate_response_list(outputs)
\ No newline at end of file
+    for t in all_teams_data:
+        if team is not None and t.name != team:
+            continue
+
+        current_output = ''
+        current_output += f"**{t.name}**\n"
+        for player in t.players:
+            if player.is_doubtful:
+                symbol = '\U0001F534' # large red circle
+            else:
+                symbol = '\U0001F7E1' # large yellow circle
+
+            current_output += f"{symbol} _{player.name} - {player.return_date}_\n"
+        current_output += '\n'
+        outputs.append(current_output)
+
+    return generate_response_list(outputs)
@@ -0,0 +1,185 @@
+import bisect
+import math
+import time
+from array import array
+from .helper_functions import decimal_to_american, format_handicap, format_with_decimal, generate_response_list
+
+# one column per price tracked for an event
+FIELDS = (
+    'ml_home', 'ml_away',
+    'spread_hdp', 'spread_home', 'spread_away',
+    'total_points', 'total_over', 'total_under'
+)
+MAX_POINTS_PER_EVENT = 500
+
+
+def _flatten(event) -> tuple:
+    # Event -> one float per FIELDS entry, NaN where a market is missing
+    money_line, spread, total = event.markets
+    row = [money_line.home, money_line.away]
+    row += (spread.line, spread.home, spread.away) if spread is not None else (None,) * 3
+    row += (total.line, total.over, total.under) if total is not None else (None,) * 3
+    return tuple(math.nan if value is None else float(value) for value in row)
+
+
+def _same(a: float, b: float) -> bool:
+    return a == b or (math.isnan(a) and math.isnan(b))
+
+
+class EventHistory:
+    """
+    Line movement for one event, stored as flat float arrays
+
+    A row is only appended when a price changes, so a quiet game costs one
+    row no matter how often it is polled.
+    """
+
+    __slots__ = ('event_id', 'home', 'away', 'starts', 'times', 'values')
+
+    def __init__(self, event_id, home: str, away: str, starts: float):
+        self.event_id = event_id
+        self.home = home
+        self.away = away
+        self.starts = starts
+        self.times = array('d')     # unix time of each row
+        self.values = array('d')    # len(FIELDS) floats per row
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def row(self, index: int) -> tuple:
+        start = (index % len(self)) * len(FIELDS)
+        return tuple(self.values[start:start + len(FIELDS)])
+
+    def append(self, timestamp: float, row: tuple) -> bool:
+        # returns True if the row was a change and got stored
+        if len(self) and all(_same(a, b) for a, b in zip(self.row(-1), row)):
+            return False
+
+        if len(self) >= MAX_POINTS_PER_EVENT:
+            # keep the opening line, drop the oldest move after it
+            del self.times[1]
+            del self.values[len(FIELDS):2 * len(FIELDS)]
+
+        self.times.append(timestamp)
+        self.values.extend(row)
+        return True
+
+    def index_at(self, since: float) -> int:
+        # last row recorded at or before since (the opening row if none)
+        return max(0, bisect.bisect_right(self.times, since) - 1)
+
+    def diff(self, since: float = None) -> dict:
+        """
+        Prices that moved between a point in time and now
+
+        Args:
+            since: unix time to compare from, defaults to the first recorded line
+
+        Returns:
+            {field: (old, new)} for every field that changed
+        """
+        if not len(self):
+            return {}
+
+        old = self.row(0 if since is None else self.index_at(since))
+        new = self.row(-1)
+        return {
+            field: (a, b) for field, a, b in zip(FIELDS, old, new)
+            if not _same(a, b)
+        }
+
+
+class LineHistory:
+    """Line movement per sport and event, kept until each game starts"""
+
+    def __init__(self):
+        self._events = {}   # sport: {event_id: EventHistory}
+
+    def record(self, sport: str, events: list, now: float = None) -> int:
+        """
+        Add one fetched list of Events
+
+        Returns:
+            number of events whose lines changed
+        """
+        now = time.time() if now is None else now
+        histories = self._events.setdefault(sport, {})
+        changed = 0
+
+        for event in events:
+            if not event.has_lines or event.live:
+                continue
+
+            history = histories.get(event.event_id)
+            if history is None:
+                history = EventHistory(event.event_id, event.home, event.away, event.starts)
+                histories[event.event_id] = history
+
+            if history.append(now, _flatten(event)) and len(history) > 1:
+                changed += 1
+
+        # pre-game movement is all we keep, drop games that have started
+        for event_id in [event_id for event_id, history in histories.items() if history.starts <= now]:
+            del histories[event_id]
+
+        return changed
+
+    def get(self, sport: str, event_id):
+        return self._events.get(sport, {}).get(event_id)
+
+    def movements(self, sport: str, since: float = None) -> list:
+        """
+        Events with line movement, soonest game first
+
+        Returns:
+            list of (EventHistory, diff) tuples
+        """
+        moved = []
+        for history in sorted(self._events.get(sport, {}).values(), key=lambda h: h.starts):
+            diff = history.diff(since)
+            if diff:
+                moved.append((history, diff))
+        return moved
+
+
+# filled by the data layer every time markets are fetched
+line_history = LineHistory()
+
+
+def _price_change(old: float, new: float, formatter) -> str:
+    def show(value):
+        return '—' if math.isnan(value) else formatter(value)
+    return show(new) if _same(old, new) else f"{show(old)} → {show(new)}"
+
+
+def format_movement(history: EventHistory, diff: dict) -> str:
+    latest = dict(zip(FIELDS, history.row(-1)))
+
+    def change(field, formatter):
+        old, new = diff.get(field, (latest[field], latest[field]))
+        return _price_change(old, new, formatter)
+
+    output = f"**Home:** _{history.home}_\n"
+    output += f"**Away:** _{history.away}_\n"
+    output += f"**Time:** <t:{int(history.starts)}>\n"
+
+    if 'ml_home' in diff or 'ml_away' in diff:
+        output += f"**ML - Home:** _{change('ml_home', decimal_to_american)}_, **Away:** _{change('ml_away', decimal_to_american)}_\n"
+
+    if any(field in diff for field in ('spread_hdp', 'spread_home', 'spread_away')):
+        # away handicap is the opposite of home, same as format_lines
+        output += f"**Spread - Home:** _{change('spread_hdp', format_handicap)} {change('spread_home', decimal_to_american)}_, "
+        output += f"**Away:** _{change('spread_hdp', lambda line: format_handicap(-line))} {change('spread_away', decimal_to_american)}_\n"
+
+    if any(field in diff for field in ('total_points', 'total_over', 'total_under')):
+        output += f"**Total Points:** _{change('total_points', format_with_decimal)}, "
+        output += f"o {change('total_over', decimal_to_american)}, u {change('total_under', decimal_to_american)}_\n"
+
+    return output + '\n'
+
+
+def format_movements(movements: list) -> list[str]:
+    if not movements:
+        return ["No line movement recorded yet. Check back after the lines update."]
+    return generate_response_list([format_movement(history, diff) for history, diff in movements])
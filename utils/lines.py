@@ -1,12 +1,15 @@
-import requests
-from datetime import datetime, timedelta
+import json
+from datetime import datetime
 from dotenv import load_dotenv
 import os
+from . import http_client
+from .models import Event, Market
 from .helper_functions import decimal_to_american, format_handicap, format_with_decimal, generate_response_list
 
 load_dotenv()
 API_KEY = os.getenv('X-RAPIDAPI-KEY')
 API_HOST = os.getenv('X-RAPIDAPI-HOST')
+PINNACLE_BASE_URL = os.getenv('PINNACLE_BASE_URL', 'https://pinnacle-odds.p.rapidapi.com')
 
 headers = {
 	"x-rapidapi-key": API_KEY,
@@ -20,68 +23,109 @@ sports_map = {
     'nba': ['3', '487']
 }
 
-def get_lines(sport):
+async def fetch_markets(sport):
     # sport_id: 7 is american football, league_ids: 889 for NFL
     # sport_id: 3 is basketball, league_ids: 487 for NBA
 
-    url = "https://pinnacle-odds.p.rapidapi.com/kit/v1/markets"
+    url = f"{PINNACLE_BASE_URL}/kit/v1/markets"
     querystring = {
         "sport_id":sports_map[sport][0],
                    "is_have_odds":"true",
                    "league_ids":sports_map[sport][1]
                    }
-    response = requests.get(url, headers=headers, params=querystring)
-    data = response.json()
+    content = await http_client.fetch(url, params=querystring, headers=headers)
+    return json.loads(content)
 
-    outputs = []
+def _first(markets):
+    # pinnacle keys alternate lines by id, the first one is the main line
+    return next(iter(markets.values())) if markets else None
+
+def parse_event(event):
+    """Build an Event from one raw Pinnacle event, None for props like MLB hits+runs+errors"""
+    if event['resulting_unit'] == 'Hits + Runs + Errors':
+        return None
+
+    game_data = event['periods']['num_0']
+    parsed = Event(
+        event_id=event['event_id'],
+        home=event['home'],
+        away=event['away'],
+        starts=datetime.strptime(event['starts'], "%Y-%m-%dT%H:%M:%S").timestamp(),
+        live=event['event_type'] == 'live'
+    )
+
+    if game_data.get('money_line'):
+        money_line = game_data['money_line']
+        parsed.money_line = Market(None, money_line.get('home'), money_line.get('away'))
+
+    spread_info = _first(game_data.get('spreads'))
+    if spread_info:
+        parsed.spread = Market(spread_info['hdp'], spread_info['home'], spread_info['away'])
 
+    total_info = _first(game_data.get('totals'))
+    if total_info:
+        parsed.total = Market(total_info['points'], total_info['over'], total_info['under'])
+
+    return parsed
+
+def parse_events(data):
+    """Parse a fetched markets response into a list of Events"""
+    events = []
     for event in data['events']:
+        parsed = parse_event(event)
+        if parsed is not None:
+            events.append(parsed)
+    return events
+
+def format_event(event):
+    """Format one event's lines, None if the event isn't shown"""
+    # events with no money line (usually live) aren't shown
+    if not event.has_lines:
+        return None
+
+    current_match = ''
+    if event.live:
+        current_match += f"\U0001F7E2 **_LIVE_**\n"
+    current_match += f"**Home:** _{event.home}_\n"
+    current_match += f"**Away:** _{event.away}_\n"
+    current_match += f"**Time:** <t:{int(event.starts)}>\n"
 
-        if event['resulting_unit'] == 'Hits + Runs + Errors':
-            continue
-
-        current_match = ''
-        dt_obj = datetime.strptime(event['starts'], "%Y-%m-%dT%H:%M:%S")
-        #dt_obj = dt_obj - timedelta(hours=4)
-        if event['event_type'] == 'live':
-            current_match += f"\U0001F7E2 **_LIVE_**\n"
-        current_match += f"**Home:** _{event['home']}_\n"
-        current_match += f"**Away:** _{event['away']}_\n"
-        current_match += f"**Time:** <t:{int(dt_obj.timestamp())}>\n"
-
-        game_data = event['periods']['num_0']
-
-        # skip if no data, usually for live events
-        if not game_data.get('money_line'):
-            continue
-        
-        if game_data.get('money_line'):
-            home_ml = game_data['money_line'].get('home')
-            away_ml = game_data['money_line'].get('away')
-            current_match += f"**ML - Home:** _{decimal_to_american(home_ml)}_, **Away**: _{decimal_to_american(away_ml)}_\n"
-
-        if game_data.get('spreads'):
-            first_spread_key = list(game_data['spreads'].keys())[0]
-            spread_info = game_data['spreads'][first_spread_key]
-            
-            # Format the handicap for home and away (away is opposite of home)
-            home_handicap = spread_info['hdp']
-            away_handicap = -home_handicap
-            
-            home_spread = decimal_to_american(spread_info['home'])
-            away_spread = decimal_to_american(spread_info['away'])
-            
-            current_match += f"**Spread - Home:** _{format_handicap(home_handicap)} {home_spread}_, **Away:** _{format_handicap(away_handicap)} {away_spread}_\n"
-
-        if game_data.get('totals'):
-            first_total_key = list(game_data['totals'].keys())[0]
-            total_info = game_data['totals'][first_total_key]
-            points = format_with_decimal(total_info['points'])
-            over_odds = decimal_to_american(total_info['over'])
-            under_odds = decimal_to_american(total_info['under'])
-            current_match += f"**Total Points:** _o{points} {over_odds}, u{points} {under_odds}_\n"
-        
-        current_match += '\n'
-        outputs.append(current_match)
+    money_line = event.money_line
+    current_match += f"**ML - Home:** _{decimal_to_american(money_line.home)}_, **Away**: _{decimal_to_american(money_line.away)}_\n"
+
+    if event.spread:
+        # Format the handicap for home and away (away is opposite of home)
+        home_handicap = event.spread.line
+        away_handicap = -home_handicap
+
+        home_spread = decimal_to_american(event.spread.home)
+        away_spread = decimal_to_american(event.spread.away)
+
+        current_match += f"**Spread - Home:** _{format_handicap(home_handicap)} {home_spread}_, **Away:** _{format_handicap(away_handicap)} {away_spread}_\n"
+
+    if event.total:
+        points = format_with_decimal(event.total.line)
+        over_odds = decimal_to_american(event.total.over)
+        under_odds = decimal_to_american(event.total.under)
+        current_match += f"**Total Points:** _o{points} {over_odds}, u{points} {under_odds}_\n"
+
+    current_match += '\n'
+    return current_match
+
+def format_lines(events):
+    outputs = []
+    for event in events:
+        current_match = format_event(event)
+        if current_match:
+            outputs.append(current_match)
 
     return generate_response_list(outputs)
+
+def line_snapshot(events):
+    # event_id: (money line, spread, total) Markets for every shown event
+    return {event.event_id: event.markets for event in events if event.has_lines}
+
+def changed_events(previous, current):
+    # ids of events whose money line, spread or total differ between snapshots
+    return [event_id for event_id, values in current.items()
+            if event_id in previous and previous[event_id] != values]
@@ -0,0 +1,124 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')            # json or text
+LOG_FILE = os.getenv('LOG_FILE')                        # rotating file, stderr if unset
+LOG_MAX_MB = float(os.getenv('LOG_MAX_MB', 20))
+LOG_BACKUPS = int(os.getenv('LOG_BACKUPS', 5))
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+LOG_MESSAGE_SAMPLE_RATE = float(os.getenv('LOG_MESSAGE_SAMPLE_RATE', 0.01))
+
+# loggers whose records are sampled instead of all written: logger name: keep rate
+SAMPLED_LOGGERS = {
+    'omni.messages': LOG_MESSAGE_SAMPLE_RATE
+}
+
+# attributes every LogRecord has, anything else came in through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any extra= fields as top-level keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        # records from the queue carry their traceback as text already
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a random fraction of records from high-volume loggers"""
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.name)
+        return rate is None or random.random() < rate
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that drops records when the queue is full
+
+    The event loop only ever does a put_nowait; formatting and writing
+    happen on the listener thread, so a slow disk can't stall the bot.
+    """
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # keep the record as is (extras included), only freeze the message and traceback text
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging() -> None:
+    """
+    Route all logging through a bounded queue to a background writer thread
+
+    Safe to call more than once, only the first call configures anything.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    if LOG_FILE:
+        output = logging.handlers.RotatingFileHandler(
+            LOG_FILE, maxBytes=int(LOG_MAX_MB * 1024 * 1024), backupCount=LOG_BACKUPS, encoding='utf-8'
+        )
+    else:
+        output = logging.StreamHandler()
+
+    if LOG_FORMAT == 'json':
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter('%(asctime)s %(levelname)-8s %(name)s: %(message)s'))
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = DroppingQueueHandler(log_queue)
+    # sample before enqueueing so dropped records cost nothing downstream
+    handler.addFilter(SamplingFilter(SAMPLED_LOGGERS))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
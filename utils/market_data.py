@@ -0,0 +1,102 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+MARKET_CACHE_MAX_MB = float(os.getenv('MARKET_CACHE_MAX_MB', 64))
+
+# seconds intraday frames stay fresh, by candle interval
+INTRADAY_TTLS = {
+    '5m': 30,
+    '30m': 120
+}
+
+# seconds daily frames stay fresh, by period (long ranges barely move)
+DAILY_TTLS = {
+    '1d': 60,
+    '5d': 60,
+    '1mo': 300,
+    '3mo': 600,
+    '6mo': 900,
+    '1y': 1800,
+    '5y': 3 * 3600
+}
+
+INFO_TTL = 60
+
+
+def history_ttl(period: str, interval: str) -> float:
+    if interval in INTRADAY_TTLS:
+        return INTRADAY_TTLS[interval]
+    return DAILY_TTLS.get(period, 300)
+
+
+def _size_of(value) -> int:
+    # pandas objects report their real footprint, anything else is a rough estimate
+    if hasattr(value, 'memory_usage'):
+        usage = value.memory_usage(deep=True)
+        # a DataFrame reports per column, a Series one total
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    return sys.getsizeof(value) + len(repr(value))
+
+
+class MarketDataCache:
+    """
+    Thread-safe LRU cache for yfinance info dicts and history frames
+
+    Entries expire after their own TTL and the least recently used ones are
+    evicted once the total size passes max_bytes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()   # key: (expires_at, value, size)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        # returns None if missing or expired
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, ttl: float) -> None:
+        size = _size_of(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value, size)
+            self._size += size
+
+            # evict least recently used, but always keep the newest entry
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key) -> None:
+        _, _, size = self._entries.pop(key)
+        self._size -= size
+
+
+# shared by every /stock request
+market_cache = MarketDataCache(int(MARKET_CACHE_MAX_MB * 1024 * 1024))
@@ -0,0 +1,237 @@
+import bisect
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dotenv import load_dotenv
+
+load_dotenv()
+METRICS_PORT = os.getenv('METRICS_PORT')                # serve Prometheus text here, off if unset
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
+# histogram bucket upper bounds in seconds, the last one catches everything
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float('inf'))
+QUANTILES = (0.5, 0.95, 0.99)
+
+# work done outside any command (background refreshes, prefetches) is filed under this
+BACKGROUND = 'background'
+
+_timer = ContextVar('command_timer', default=None)
+_in_phase = ContextVar('in_phase', default=False)
+
+_latency = {}               # (command, phase): Histogram, phase 'total' is the command's wall time
+_errors = defaultdict(int)  # (command, kind): count
+_caches = {}                # name: object with hits and misses counters
+_server = None
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram
+
+    Observing is a bisect and an increment, and memory stays constant no
+    matter how many samples come in. Quantiles are interpolated within
+    the bucket they fall in.
+    """
+
+    __slots__ = ('counts', 'count', 'sum')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = BUCKETS[i - 1] if i else 0.0
+                # nothing to interpolate towards in the overflow bucket
+                upper = BUCKETS[i] if i < len(BUCKETS) - 1 else lower
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return BUCKETS[-2]
+
+
+class CommandTimer:
+    """Wall time of one command and the time it spent in each phase"""
+
+    __slots__ = ('command', 'start', 'phases')
+
+    def __init__(self, command: str):
+        self.command = command
+        self.start = time.perf_counter()
+        self.phases = defaultdict(float)    # phase: seconds
+
+
+def _observe(command: str, phase: str, seconds: float) -> None:
+    histogram = _latency.get((command, phase))
+    if histogram is None:
+        histogram = _latency[(command, phase)] = Histogram()
+    histogram.observe(seconds)
+
+
+def start_command(command: str) -> CommandTimer:
+    """
+    Start timing a command in the current task
+
+    Phases entered anywhere below it, including in tasks it spawns, are
+    added to this timer.
+    """
+    timer = CommandTimer(command)
+    _timer.set(timer)
+    return timer
+
+
+def finish_command(timer: CommandTimer, failed: bool = False) -> None:
+    if timer is None:
+        return
+    _observe(timer.command, 'total', time.perf_counter() - timer.start)
+    for name, seconds in timer.phases.items():
+        _observe(timer.command, name, seconds)
+    if failed:
+        _errors[(timer.command, 'unhandled')] += 1
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Attribute the time spent in the block to a phase (upstream:<name>, parse, render, send)
+
+    Only the outermost phase counts, so a parse that runs through
+    run_blocking isn't also counted as upstream time.
+    """
+    if _in_phase.get():
+        yield
+        return
+
+    token = _in_phase.set(True)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        _in_phase.reset(token)
+        timer = _timer.get()
+        if timer is None:
+            _observe(BACKGROUND, name, seconds)
+        else:
+            timer.phases[name] += seconds
+
+
+def count_error(kind: str) -> None:
+    timer = _timer.get()
+    _errors[(BACKGROUND if timer is None else timer.command, kind)] += 1
+
+
+def register_cache(name: str, cache) -> None:
+    # cache just needs hits and misses counters
+    _caches[name] = cache
+
+
+def cache_hit_rates() -> dict:
+    # name: (hits, misses, hit rate)
+    rates = {}
+    for name, cache in _caches.items():
+        lookups = cache.hits + cache.misses
+        rates[name] = (cache.hits, cache.misses, cache.hits / lookups if lookups else 0.0)
+    return rates
+
+
+def report() -> str:
+    lines = ["**Latency** p50 / p95 / p99 (count)"]
+    for command in sorted({command for command, _ in _latency}):
+        phases = sorted(
+            (phase_name, histogram) for (name, phase_name), histogram in _latency.items() if name == command
+        )
+        # total first, then each phase
+        phases.sort(key=lambda item: item[0] != 'total')
+        lines.append(f"`/{command}`" if command != BACKGROUND else f"`{BACKGROUND}`")
+        for phase_name, histogram in phases:
+            p50, p95, p99 = (histogram.quantile(q) * 1000 for q in QUANTILES)
+            lines.append(f"`{phase_name:>18} {p50:7.0f} {p95:7.0f} {p99:7.0f} ms` ({histogram.count})")
+
+    lines.append("\n**Cache hit rates**")
+    for name, (hits, misses, rate) in cache_hit_rates().items():
+        lines.append(f"`{name:>18} {rate:6.1%}` ({hits} hits, {misses} misses)")
+
+    lines.append("\n**Errors**")
+    if not _errors:
+        lines.append("none")
+    for (command, kind), count in sorted(_errors.items()):
+        lines.append(f"`{command} {kind}`: {count}")
+    return '\n'.join(lines)
+
+
+def _labels(**labels) -> str:
+    escaped = {key: str(value).replace('\\', '\\\\').replace('"', '\\"') for key, value in labels.items()}
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped.items()) + '}'
+
+
+def prometheus_text() -> str:
+    """Every metric in the Prometheus text exposition format"""
+    out = [
+        "# HELP omni_latency_seconds Command wall time (phase total) and time per phase",
+        "# TYPE omni_latency_seconds histogram"
+    ]
+    for (command, phase_name), histogram in sorted(_latency.items()):
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS, histogram.counts):
+            cumulative += bucket_count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            out.append(f"omni_latency_seconds_bucket{_labels(command=command, phase=phase_name, le=le)} {cumulative}")
+        labels = _labels(command=command, phase=phase_name)
+        out.append(f"omni_latency_seconds_sum{labels} {histogram.sum}")
+        out.append(f"omni_latency_seconds_count{labels} {histogram.count}")
+
+    out += ["# HELP omni_errors_total Errors by command and kind", "# TYPE omni_errors_total counter"]
+    for (command, kind), count in sorted(_errors.items()):
+        out.append(f"omni_errors_total{_labels(command=command, kind=kind)} {count}")
+
+    out += ["# HELP omni_cache_lookups_total Cache lookups by result", "# TYPE omni_cache_lookups_total counter"]
+    for name, (hits, misses, _) in cache_hit_rates().items():
+        out.append(f"omni_cache_lookups_total{_labels(cache=name, result='hit')} {hits}")
+        out.append(f"omni_cache_lookups_total{_labels(cache=name, result='miss')} {misses}")
+    return '\n'.join(out) + '\n'
+
+
+async def start_server(host: str = METRICS_HOST, port: int = None) -> bool:
+    """
+    Serve /metrics for a local Prometheus scraper, if METRICS_PORT (or port) is set
+
+    Returns:
+        True if the endpoint is running
+    """
+    global _server
+    port = port or (int(METRICS_PORT) if METRICS_PORT else None)
+    if port is None or _server is not None:
+        return _server is not None
+
+    # aiohttp already comes with discord.py
+    from aiohttp import web
+
+    async def handle(request):
+        return web.Response(text=prometheus_text(), content_type='text/plain', charset='utf-8')
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle)
+    _server = web.AppRunner(app, access_log=None)
+    await _server.setup()
+    await web.TCPSite(_server, host, port).start()
+    return True
+
+
+async def stop_server() -> None:
+    global _server
+    if _server is not None:
+        await _server.cleanup()
+        _server = None
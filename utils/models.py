@@ -0,0 +1,62 @@
+from dataclasses import dataclass, field
+
+# typed data produced by the parsing stage; formatting for Discord happens
+# separately, so these can be cached, filtered and diffed without refetching
+
+
+@dataclass(slots=True, frozen=True)
+class Market:
+    """Decimal prices for one market"""
+    line: float | None      # home handicap for spreads, points for totals, None for money lines
+    home: float             # home price (over for totals)
+    away: float             # away price (under for totals)
+
+    @property
+    def over(self) -> float:
+        return self.home
+
+    @property
+    def under(self) -> float:
+        return self.away
+
+
+@dataclass(slots=True)
+class Event:
+    """One game and its full-game markets"""
+    event_id: int
+    home: str
+    away: str
+    starts: float           # unix time
+    live: bool
+    money_line: Market | None = None
+    spread: Market | None = None
+    total: Market | None = None
+
+    @property
+    def has_lines(self) -> bool:
+        # live events often come through without a money line
+        return self.money_line is not None
+
+    @property
+    def markets(self) -> tuple:
+        return self.money_line, self.spread, self.total
+
+
+@dataclass(slots=True, frozen=True)
+class InjuredPlayer:
+    name: str
+    position: str
+    return_date: str
+    status: str
+    comment: str
+
+    @property
+    def is_doubtful(self) -> bool:
+        # day-to-day and questionable players may still play
+        return self.status not in ('Day-To-Day', 'Questionable')
+
+
+@dataclass(slots=True)
+class Team:
+    name: str
+    players: list[InjuredPlayer] = field(default_factory=list)
@@ -0,0 +1,73 @@
+import importlib
+import sys
+import time
+from contextlib import contextmanager
+
+# heavy dependencies only some commands need, imported on first use
+# (matplotlib isn't one, only chart worker processes import it)
+HEAVY_MODULES = ('yfinance', 'pandas', 'numpy', 'openai')
+
+# close enough to process start, main imports this module first
+PROCESS_START = time.perf_counter()
+
+_milestones = {}    # milestone: seconds since process start
+_steps = {}         # startup step: seconds it took, in the order they ran
+_imports = {}       # module: seconds its first import took
+
+
+@contextmanager
+def phase(name: str):
+    """Time one startup step (a cog load, the command sync) for the /startup report"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _steps[name] = time.perf_counter() - start
+
+
+def mark(name: str) -> None:
+    # record a milestone as seconds since process start
+    _milestones[name] = time.perf_counter() - PROCESS_START
+
+
+def is_marked(name: str) -> bool:
+    return name in _milestones
+
+
+def lazy_import(name: str):
+    """
+    Import a module the first time it is needed, recording how long that took
+
+    Returns:
+        the module
+    """
+    module = sys.modules.get(name)
+    if module is None:
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        _imports.setdefault(name, time.perf_counter() - start)
+    return module
+
+
+def warm_up_imports() -> None:
+    # run in a worker thread after ready so the first command doesn't pay for the imports
+    for name in HEAVY_MODULES:
+        lazy_import(name)
+
+
+def report() -> str:
+    lines = ["**Milestones** (since process start)"]
+    lines += [f"`{seconds * 1000:8.0f} ms` {name}" for name, seconds in _milestones.items()]
+
+    lines.append("\n**Steps**")
+    lines += [f"`{seconds * 1000:8.0f} ms` {name}" for name, seconds in _steps.items()]
+
+    lines.append("\n**Lazy imports**")
+    for name in HEAVY_MODULES:
+        if name in _imports:
+            lines.append(f"`{_imports[name] * 1000:8.0f} ms` {name}")
+        elif name in sys.modules:
+            lines.append(f"`{'—':>8}   ` {name} (pulled in by another import)")
+        else:
+            lines.append(f"`{'—':>8}   ` {name} (not loaded yet)")
+    return '\n'.join(lines)
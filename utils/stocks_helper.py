@@ -1,243 +1,163 @@
-import yfinance as yf
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import io
-import discord
+import logging
+import re
 from datetime import datetime, time
 import pytz
-import pandas as pd
-import numpy as np
+from .market_data import market_cache, history_ttl, INFO_TTL
+from .startup import lazy_import
 
-def create_stock_chart(ticker: str, period: str = "1d"):
+# yfinance, pandas and matplotlib take seconds to import, so they're
+# loaded on first use instead of when the bot starts
+
+# one /stocks call covers at most this many tickers (and chart panels)
+MAX_BATCH_TICKERS = 20
+
+log = logging.getLogger(__name__)
+
+def chart_interval(period: str):
     """
-    Create a stock chart and return as Discord file
-    
-    Args:
-        ticker: Stock symbol (e.g., 'AAPL')
-        period: Time period (1d, 5d, 1mo, 3mo, 6mo, 1y, 5y)
-    
+    Get the candle interval and prepost flag used to chart a period
+
     Returns:
-        discord.File object or None if error
+        (interval, prepost) tuple
     """
-    fig = None
-    try:
-        stock = yf.Ticker(ticker)
-        
-        # valid intervals: 1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 4h, 1d, 5d, 1wk, 1mo, 3mo
-        if period == "1d":
-            interval = "5m"
-            prepost = True
-        elif period == "5d":
-            interval = "30m"
-            prepost = False
-        else:
-            interval = "1d"
-            prepost = False
-        
-        hist = stock.history(period=period, interval=interval, prepost=prepost, auto_adjust=False)
-        if period == "1d":
-            if hist.index.tz is None:
-                hist.index = hist.index.tz_localize('UTC')
-        eastern = pytz.timezone("US/Eastern")
-        hist.index = hist.index.tz_convert(eastern).tz_localize(None)
-        
+    # valid intervals: 1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 4h, 1d, 5d, 1wk, 1mo, 3mo
+    if period == "1d":
+        return "5m", True
+    elif period == "5d":
+        return "30m", False
+    else:
+        return "1d", False
 
-        # for timestamp, row in hist.iterrows():
-        #     print(timestamp, row["Close"])
+def is_trading_session() -> bool:
+    # true on weekdays from premarket open to after hours close (eastern time)
+    now = datetime.now(pytz.timezone('US/Eastern'))
+    return now.weekday() < 5 and time(4, 0) <= now.time() < time(20, 0)
 
-        
+def is_extended_hours() -> bool:
+    # true outside NYSE regular hours (eastern time)
+    current_time = datetime.now(pytz.timezone('US/Eastern')).time()
+    return current_time < time(9, 30) or current_time >= time(16, 0)
+
+class MarketSnapshot:
+    """
+    Yahoo data for one /stock request, each upstream call made at most once
+
+    get_stock_info and create_stock_chart both read from the same snapshot,
+    so a request pays for one info call and only the history frames it needs.
+    Frames still fresh in the shared market cache aren't fetched at all.
+    """
+
+    def __init__(self, ticker: str, period: str = "1d", min_ttl: float = 0):
+        self.ticker = ticker
+        self.period = period
+        # prefetches keep what they fetch at least this long, so it lasts until the next one
+        self.min_ttl = min_ttl
+        self._stock = None
+        self.fetched = []       # upstream calls made, in order ('info' or (period, interval, prepost))
+        self._info = None
+        self._history = {}      # (period, interval, prepost): DataFrame
+
+    @property
+    def stock(self):
+        # built on first use, inside the blocking call, so importing yfinance never stalls the event loop
+        # (Ticker objects are cheap but memoize .info forever, so one per request)
+        if self._stock is None:
+            self._stock = lazy_import('yfinance').Ticker(self.ticker)
+        return self._stock
+
+    @stock.setter
+    def stock(self, stock) -> None:
+        self._stock = stock
+
+    @property
+    def info(self) -> dict:
+        if self._info is None:
+            cache_key = (self.ticker, 'info')
+            self._info = market_cache.get(cache_key)
+            if self._info is None:
+                self._info = self.stock.info
+                self.fetched.append('info')
+                market_cache.put(cache_key, self._info, max(INFO_TTL, self.min_ttl))
+        return self._info
+
+    def history(self, period: str, interval: str, prepost: bool = False):
+        key = (period, interval, prepost)
+        if key not in self._history:
+            cache_key = (self.ticker, period, interval, prepost)
+            hist = market_cache.get(cache_key)
+            if hist is None:
+                hist = self.stock.history(period=period, interval=interval, prepost=prepost, auto_adjust=False)
+                self.fetched.append(key)
+                # don't hold on to empty frames from bad tickers or outages
+                if not hist.empty:
+                    market_cache.put(cache_key, hist, max(history_ttl(period, interval), self.min_ttl))
+            self._history[key] = hist
+        return self._history[key]
+
+    def daily_history(self):
+        return self.history(self.period, "1d")
+
+    def chart_history(self):
+        interval, prepost = chart_interval(self.period)
+        return self.history(self.period, interval, prepost)
+
+    def prepost_history(self):
+        return self.history("1d", "5m", prepost=True)
+
+    def prefetch(self) -> None:
+        """Fetch everything a /stock response needs in one go"""
+        self.info
+        self.daily_history()
+        self.chart_history()
+        if is_extended_hours():
+            self.prepost_history()
+
+def get_chart_data(ticker: str, period: str = "1d", snapshot: MarketSnapshot = None):
+    """
+    Get what render_stock_chart needs from the snapshot
+
+    Returns:
+        (hist, prev_close) tuple or None if there is nothing to chart
+    """
+    try:
+        snapshot = snapshot or MarketSnapshot(ticker, period)
+        hist = snapshot.chart_history()
         if hist.empty:
             return None
-        
-        # determine color based on performance
-        price_change = hist['Close'].iloc[-1] - hist['Close'].iloc[0]
-        line_color = '#00ff00' if price_change >= 0 else '#ff0000'
-        
-        # create the chart with dark theme
-        plt.style.use('dark_background')
-        fig, ax = plt.subplots(figsize=(12, 6))
-        
-        if period == "1d":
-            premarket = hist.between_time("00:00", "09:30")
-            regular_hours = hist.between_time("09:30", "16:00")  # NYSE regular
-            postmarket = hist.between_time("16:00", "23:59")
-           
-            # plot premarket
-            if not premarket.empty:
-                ax.plot(premarket.index, premarket['Close'], color="#888888",
-                        linestyle="--", linewidth=1.5)            
-                ax.fill_between(
-                    premarket.index,
-                    premarket["Close"],
-                    alpha=0.2,
-                    color="#888888"
-                )  
-            # plot regular hours
-            if not regular_hours.empty:
-                ax.plot(regular_hours.index, regular_hours['Close'], color=line_color, linewidth=2.5)
-                # fill regular hours area
-                ax.fill_between(
-                    regular_hours.index,
-                    regular_hours["Close"],
-                    alpha=0.3,
-                    color=line_color
-                )
-
-            # plot after hours in gray
-            if not postmarket.empty:
-                ax.plot(postmarket.index, postmarket['Close'], color="#888888", linewidth=1.5, linestyle='--')
-                ax.fill_between(
-                    postmarket.index,
-                    postmarket["Close"],
-                    alpha=0.2,
-                    color="#888888"
-                )
-            
-            prev_close = stock.info.get("previousClose")
-
-            # plot prev close line and adjust boundaries
-            if prev_close is not None:
-                ax.axhline(prev_close, color="white", alpha=0.7, linestyle="--", linewidth=1.5)
-                ax.annotate(
-                    f'Prev Close:\n${prev_close:.2f}',
-                    xy=(hist.index[-1], prev_close),
-                    xytext=(10, 10),
-                    textcoords='offset points',
-                    bbox=dict(boxstyle="round,pad=0.3", fc="#2C2F33", alpha=0.7),
-                    color="white",
-                    fontsize=12,
-                    fontweight='bold'
-                )
-
-                ymin = min(hist['Close'].min(), prev_close)
-                ymax = max(hist['Close'].max(), prev_close)    
-            else:
-                ymin = hist['Close'].min()
-                ymax = hist['Close'].max()
-
-            padding = (ymax - ymin) * 0.05  # 5% margin
-            ax.set_ylim(ymin - padding, ymax + padding)
-            
-            # format x-axis for 1d
-            ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
-            current_date = datetime.now(pytz.timezone("US/Eastern")).strftime("%b %d")
-            ax.set_xlabel(current_date, fontsize=12)
-
-            # extend x-axis to 8pm even if theres no data yet
-            trading_day = hist.index[-1].date()
-            forced_end = eastern.localize(datetime.combine(trading_day, time(20, 0)))
-            forced_end = forced_end.replace(tzinfo=None)
-            
-            ax.set_xlim(hist.index[0], forced_end)
-            ax.margins(x=0)
-            
-            # add current price annotation with color based on market hours
-            current_price = hist['Close'].iloc[-1]
-            current_time = hist.index[-1].time()
-            market_open = time(9, 30)
-            market_close = time(16, 0)
-
-            if current_time < market_open:
-                box_color = "#888888"
-                label_text = f'${current_price:.2f}\n(Pre-Market)'
-            elif current_time >= market_close:
-                box_color = "#888888"
-                label_text = f'${current_price:.2f}\n(After-Hours)'
-            else:
-                box_color = line_color
-                label_text = f'${current_price:.2f}'
-
-            ax.annotate(label_text, 
-                       xy=(hist.index[-1], current_price),
-                       xytext=(10, 10), textcoords='offset points',
-                       bbox=dict(boxstyle='round,pad=0.5', fc=box_color, alpha=0.7),
-                       fontsize=12, fontweight='bold')
-        
-        else:
-            # For multi-day: remove gaps by using integer index
-            actual_dates = hist.index.copy()
-            hist_plot = hist.reset_index(drop=True)
-            
-            # plot with integer index (no gaps)
-            ax.plot(hist_plot.index, hist_plot['Close'], linewidth=2.5, color=line_color)
-            ax.fill_between(hist_plot.index, hist_plot["Close"], alpha=0.3, color=line_color)
-            
-            prev_close = stock.info.get("previousClose")
-            
-            if prev_close is not None:
-                ymin = min(hist_plot['Close'].min(), prev_close)
-                ymax = max(hist_plot['Close'].max(), prev_close)    
-            else:
-                ymin = hist_plot['Close'].min()
-                ymax = hist_plot['Close'].max()
-
-            padding = (ymax - ymin) * 0.05
-            ax.set_ylim(ymin - padding, ymax + padding)
-            
-            # Set x-axis to show actual dates at intervals
-            num_ticks = min(8, len(hist_plot))
-            tick_positions = np.linspace(0, len(hist_plot)-1, num_ticks, dtype=int)
-            ax.set_xticks(tick_positions)
-            ax.set_xticklabels([actual_dates[i].strftime("%b %d") for i in tick_positions])
-            
-            ax.set_xlim(0, len(hist_plot)-1)
-            ax.margins(x=0)
-            
-            # Add current price annotation (using integer position)
-            current_price = hist_plot['Close'].iloc[-1]
-            ax.annotate(f'${current_price:.2f}', 
-                       xy=(hist_plot.index[-1], current_price),
-                       xytext=(10, 10), textcoords='offset points',
-                       bbox=dict(boxstyle='round,pad=0.5', fc=line_color, alpha=0.7),
-                       fontsize=12, fontweight='bold')
-
-        # Common formatting
-        ax.set_title(f'{ticker.upper()} Stock Price - {period.upper()}', fontsize=18, fontweight='bold', pad=20)
-        ax.set_ylabel('Price (USD)', fontsize=12)
-        ax.grid(True, alpha=0.2, linestyle='--')
-        
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        
-        # save to bytes buffer
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=100, bbox_inches='tight', facecolor='#2C2F33')
-        buf.seek(0)
-        plt.close(fig)
-        
-        # return as Discord file
-        return discord.File(buf, filename=f'{ticker}_chart.png')
-        
+        return hist, snapshot.info.get("previousClose")
+
     except Exception as e:
-        print(f"Error creating chart for {ticker}: {e}")
+        log.warning("chart data fetch failed", extra={'ticker': ticker, 'period': period, 'error': repr(e)})
         return None
 
-    finally:
-        if fig is not None:
-            plt.close(fig)
-        plt.close('all') # cleans up any orphaned figures
 
+def chart_version(hist, prev_close) -> tuple:
+    # changes whenever a new candle lands or the latest one moves
+    return (len(hist), hist.index[-1].isoformat(), float(hist['Close'].iloc[-1]), prev_close)
 
-def get_stock_info(ticker: str, period: str = "1d"):
+
+def get_stock_info(ticker: str, period: str = "1d", snapshot: MarketSnapshot = None):
     """
     Get stock information from yfinance
     
     Args:
         ticker: stock symbol
         period: time period (1d, 5d, 1mo, etc.)
+        snapshot: snapshot to read from, also warmed with the chart's data
     
     Returns:
         dict with stock info or None if error
     """
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        snapshot = snapshot or MarketSnapshot(ticker, period)
+        snapshot.prefetch()
+        info = snapshot.info
         
         # for some reason Google's 5d chart uses the open value of the very first candle at 9:30 
         # instead of close of the first day
         # the logic below is needed to replicate that behaviour
 
-        hist = stock.history(period=period, auto_adjust=False, interval="1d")
+        hist = snapshot.daily_history()
 
         # for timestamp, row in hist.iterrows():
         #     print(timestamp, row["Close"])
@@ -255,7 +175,7 @@ def get_stock_info(ticker: str, period: str = "1d"):
         
         elif period == "5d":
             # Google uses this to calculate prev_close
-            hist = stock.history(period=period, auto_adjust=False, interval="30m")
+            hist = snapshot.history(period, "30m")
             prev_close = hist['Open'].iloc[0]
 
         else:
@@ -279,14 +199,12 @@ def get_stock_info(ticker: str, period: str = "1d"):
         }
     
             # additional info if in pre/post market
-        eastern = pytz.timezone('US/Eastern')
-        current_time = datetime.now(eastern).time()
-        premarket_open = time(4,0)
-        market_open = time(9, 30)
-        market_close = time(16, 0)
-
-        if current_time < market_open or current_time >= market_close:
-            prepost_hist = stock.history(period="1d", auto_adjust=False, interval="5m", prepost=True)
+        if is_extended_hours():
+            current_time = datetime.now(pytz.timezone('US/Eastern')).time()
+            premarket_open = time(4,0)
+            market_open = time(9, 30)
+
+            prepost_hist = snapshot.prepost_history()
             prepost_close = prepost_hist['Close'].iloc[-1]
             prepost_change = prepost_close - current_price
             prepost_change_pct = (prepost_change / current_price) * 100 if current_price != 0 else 0
@@ -301,5 +219,113 @@ def get_stock_info(ticker: str, period: str = "1d"):
         return result
         
     except Exception as e:
-        print(f"Error getting stock info for {ticker}: {e}")
-        return None
\ No newline at end of file
+        log.warning("stock info fetch failed", extra={'ticker': ticker, 'period': period, 'error': repr(e)})
+        return None
+
+def parse_tickers(text: str) -> list[str]:
+    # "aapl, msft nvda AAPL" -> ['AAPL', 'MSFT', 'NVDA']
+    tickers = []
+    for ticker in re.split(r'[\s,]+', text.upper()):
+        if ticker and ticker not in tickers:
+            tickers.append(ticker)
+    return tickers
+
+
+def _download_closes(tickers: list[str], period: str, interval: str, min_ttl: float = 0):
+    """
+    Close prices for several tickers, downloading only the ones not cached
+
+    Each ticker's closes are cached on their own, so any list that shares
+    tickers with an earlier one (or with prefetched watchlists) reuses them.
+    All missing tickers are fetched together in one yf.download call.
+
+    Returns:
+        DataFrame with one column per ticker that has data, or None
+    """
+    closes = {}
+    missing = []
+    for ticker in tickers:
+        series = market_cache.get((ticker, 'close', period, interval))
+        if series is None:
+            missing.append(ticker)
+        else:
+            closes[ticker] = series
+
+    if missing:
+        frame = lazy_import('yfinance').download(
+            missing, period=period, interval=interval, auto_adjust=False,
+            group_by='column', multi_level_index=True, progress=False, threads=True
+        )
+        if not frame.empty:
+            for ticker, series in frame['Close'].items():
+                series = series.dropna()
+                # don't hold on to empty series from bad tickers or outages
+                if not series.empty:
+                    ttl = max(history_ttl(period, interval), min_ttl)
+                    market_cache.put((ticker, 'close', period, interval), series, ttl)
+                    closes[ticker] = series
+
+    if not closes:
+        return None
+
+    # tickers on different calendars leave gaps, carry the last close forward
+    pd = lazy_import('pandas')
+    return pd.DataFrame({ticker: closes[ticker] for ticker in tickers if ticker in closes}).ffill()
+
+
+def get_quotes(tickers: list[str], period: str = "1d", min_ttl: float = 0):
+    """
+    Latest price and change over the period for several tickers at once
+
+    Args:
+        tickers: stock symbols, fetched together in one download
+        period: time period (1d, 5d, 1mo, etc.)
+
+    Returns:
+        DataFrame indexed by ticker (input order) with price, change and
+        change_pct columns, or None if error. Tickers without data are left out.
+    """
+    try:
+        # the 1d change is measured from the previous close, so look a few sessions back
+        closes = _download_closes(tickers, "5d" if period == "1d" else period, "1d", min_ttl)
+        if closes is None:
+            return None
+
+        # every ticker at once: one row of latest prices against one row of base prices
+        price = closes.iloc[-1]
+        if period == "1d":
+            base = closes.iloc[-2] if len(closes) > 1 else price
+        else:
+            base = closes.bfill().iloc[0]
+
+        change = price - base
+        change_pct = (change / base.where(base != 0) * 100).fillna(0)
+
+        pd = lazy_import('pandas')
+        return pd.DataFrame({'price': price, 'change': change, 'change_pct': change_pct})
+
+    except Exception as e:
+        log.warning("quotes fetch failed", extra={'tickers': tickers, 'period': period, 'error': repr(e)})
+        return None
+
+
+def get_batch_chart_data(tickers: list[str], period: str = "1d"):
+    """
+    Closes for a small-multiples chart, at the same candle size /stock charts use
+
+    Returns:
+        DataFrame with one column per ticker, or None if there is nothing to chart
+    """
+    try:
+        # for 1mo and longer this is the same download get_quotes made
+        interval, _ = chart_interval(period)
+        return _download_closes(tickers, period, interval)
+
+    except Exception as e:
+        log.warning("chart data fetch failed", extra={'tickers': tickers, 'period': period, 'error': repr(e)})
+        return None
+
+
+def batch_chart_version(closes) -> tuple:
+    # changes whenever a new candle lands or any latest close moves
+    return (len(closes), closes.index[-1].isoformat(), tuple(closes.iloc[-1].fillna(0).round(4)))
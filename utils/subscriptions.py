@@ -0,0 +1,53 @@
+import os
+import sqlite3
+import time
+from dotenv import load_dotenv
+from .db import open_db
+
+load_dotenv()
+SUBSCRIPTIONS_DB_PATH = os.getenv('SUBSCRIPTIONS_DB_PATH', 'subscriptions.db')
+
+
+class SubscriptionStore:
+    """
+    Channels subscribed to line moves per sport, kept in a SQLite file
+
+    The connection is opened on first use so importing the module never
+    touches the disk.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = open_db(
+                self.path,
+                "CREATE TABLE IF NOT EXISTS line_subscriptions ("
+                "sport TEXT, channel_id INTEGER, added_at REAL, "
+                "PRIMARY KEY (sport, channel_id))"
+            )
+        return self._db
+
+    def channels(self, sport: str) -> set[int]:
+        rows = self._connect().execute(
+            "SELECT channel_id FROM line_subscriptions WHERE sport = ?", (sport,)
+        )
+        return {channel_id for channel_id, in rows}
+
+    def add(self, sport: str, channel_id: int) -> None:
+        db = self._connect()
+        db.execute(
+            "INSERT OR IGNORE INTO line_subscriptions (sport, channel_id, added_at) VALUES (?, ?, ?)",
+            (sport, channel_id, time.time())
+        )
+        db.commit()
+
+    def remove(self, sport: str, channel_id: int) -> None:
+        db = self._connect()
+        db.execute("DELETE FROM line_subscriptions WHERE sport = ? AND channel_id = ?", (sport, channel_id))
+        db.commit()
+
+
+subscription_store = SubscriptionStore(SUBSCRIPTIONS_DB_PATH)
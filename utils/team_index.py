@@ -0,0 +1,158 @@
+import re
+import string
+
+# abbreviation: nickname, used to match short names against whatever full
+# name (city + nickname) the upstream uses
+TEAM_ABBREVIATIONS = {
+    'nfl': {
+        'ARI': 'cardinals', 'ATL': 'falcons', 'BAL': 'ravens', 'BUF': 'bills',
+        'CAR': 'panthers', 'CHI': 'bears', 'CIN': 'bengals', 'CLE': 'browns',
+        'DAL': 'cowboys', 'DEN': 'broncos', 'DET': 'lions', 'GB': 'packers',
+        'HOU': 'texans', 'IND': 'colts', 'JAX': 'jaguars', 'KC': 'chiefs',
+        'LV': 'raiders', 'LAC': 'chargers', 'LAR': 'rams', 'MIA': 'dolphins',
+        'MIN': 'vikings', 'NE': 'patriots', 'NO': 'saints', 'NYG': 'giants',
+        'NYJ': 'jets', 'PHI': 'eagles', 'PIT': 'steelers', 'SF': '49ers',
+        'SEA': 'seahawks', 'TB': 'buccaneers', 'TEN': 'titans', 'WAS': 'commanders'
+    },
+    'nba': {
+        'ATL': 'hawks', 'BOS': 'celtics', 'BKN': 'nets', 'CHA': 'hornets',
+        'CHI': 'bulls', 'CLE': 'cavaliers', 'DAL': 'mavericks', 'DEN': 'nuggets',
+        'DET': 'pistons', 'GSW': 'warriors', 'HOU': 'rockets', 'IND': 'pacers',
+        'LAC': 'clippers', 'LAL': 'lakers', 'MEM': 'grizzlies', 'MIA': 'heat',
+        'MIL': 'bucks', 'MIN': 'timberwolves', 'NOP': 'pelicans', 'NYK': 'knicks',
+        'OKC': 'thunder', 'ORL': 'magic', 'PHI': '76ers', 'PHX': 'suns',
+        'POR': 'trail blazers', 'SAC': 'kings', 'SAS': 'spurs', 'TOR': 'raptors',
+        'UTA': 'jazz', 'WAS': 'wizards'
+    },
+    'mlb': {
+        'ARI': 'diamondbacks', 'ATL': 'braves', 'BAL': 'orioles', 'BOS': 'red sox',
+        'CHC': 'cubs', 'CWS': 'white sox', 'CIN': 'reds', 'CLE': 'guardians',
+        'COL': 'rockies', 'DET': 'tigers', 'HOU': 'astros', 'KC': 'royals',
+        'LAA': 'angels', 'LAD': 'dodgers', 'MIA': 'marlins', 'MIL': 'brewers',
+        'MIN': 'twins', 'NYM': 'mets', 'NYY': 'yankees', 'OAK': 'athletics',
+        'PHI': 'phillies', 'PIT': 'pirates', 'SD': 'padres', 'SF': 'giants',
+        'SEA': 'mariners', 'STL': 'cardinals', 'TB': 'rays', 'TEX': 'rangers',
+        'TOR': 'blue jays', 'WSH': 'nationals'
+    }
+}
+
+# discord caps autocomplete at 25 choices
+MAX_CHOICES = 25
+
+
+def normalize(name: str) -> str:
+    # "St. Louis Cardinals (M. Mikolas)" -> "st louis cardinals"
+    name = re.sub(r'\(.*?\)', ' ', name.lower())
+    return ' '.join(re.sub(r'[^a-z0-9 ]', ' ', name).split())
+
+
+def team_name(name: str) -> str:
+    # "St. Louis Cardinals (M. Mikolas)" -> "St. Louis Cardinals", so every game a team plays is filed together
+    return ' '.join(re.sub(r'\(.*?\)', ' ', name).split())
+
+
+def _has_nickname(key: str, nickname: str) -> bool:
+    return key == nickname or key.endswith(' ' + nickname)
+
+
+class TeamIndex:
+    """
+    Team lookup for one parsed snapshot of a sport's lines or injuries
+
+    Built once per refresh, so a team-filtered command is a dict lookup
+    instead of a scan over the whole league.
+    """
+
+    def __init__(self, sport: str):
+        self.sport = sport
+        self._items = {}    # team name as the upstream shows it, minus any pitcher: [items]
+        self._keys = {}     # normalized name, nickname or abbreviation: team name, None if ambiguous
+
+    @classmethod
+    def from_events(cls, sport: str, events: list) -> 'TeamIndex':
+        # team -> Events it plays in
+        index = cls(sport)
+        for event in events:
+            index.add(event.home, event)
+            index.add(event.away, event)
+        return index
+
+    @classmethod
+    def from_teams(cls, sport: str, teams: list) -> 'TeamIndex':
+        # team -> its injury report
+        index = cls(sport)
+        for team in teams:
+            index.add(team.name, team)
+        return index
+
+    def add(self, name: str, item) -> None:
+        name = team_name(name)
+        if name not in self._items:
+            self._items[name] = []
+            for key in self._lookup_keys(name):
+                # a key two teams share (e.g. "sox") can't pick either of them
+                if self._keys.get(key, name) != name:
+                    self._keys[key] = None
+                else:
+                    self._keys[key] = name
+        self._items[name].append(item)
+
+    def _lookup_keys(self, name: str) -> set:
+        key = normalize(name)
+        words = key.split()
+        # the full name and every trailing run of words: "los angeles lakers", "angeles lakers", "lakers"
+        keys = {' '.join(words[i:]) for i in range(len(words))}
+        for abbreviation, nickname in TEAM_ABBREVIATIONS.get(self.sport, {}).items():
+            if _has_nickname(key, nickname):
+                keys.add(abbreviation.lower())
+        return keys
+
+    @property
+    def names(self) -> list[str]:
+        return sorted(self._items)
+
+    def get(self, name: str) -> list:
+        return self._items.get(name, [])
+
+    def resolve(self, query: str):
+        """
+        Match a user's team query to a team name in this snapshot
+
+        Returns:
+            team name, or None if nothing (or more than one team) matches
+        """
+        # the exact name autocomplete offered, with or without a pitcher
+        name = team_name(query)
+        if name in self._items:
+            return name
+
+        key = normalize(query)
+        if not key:
+            return None
+
+        name = self._keys.get(key)
+        if name is not None:
+            return name
+
+        # fall back to a unique partial match like "blaz" or "angeles l"
+        matches = [name for name in self._items if key in normalize(name)]
+        return matches[0] if len(matches) == 1 else None
+
+    def search(self, current: str) -> list[str]:
+        # team names for autocomplete, matching on name or abbreviation
+        key = normalize(current)
+        matches = [
+            name for name in self.names
+            if key in normalize(name) or self._keys.get(key) == name
+        ]
+        return matches[:MAX_CHOICES]
+
+
+def default_team_names(sport: str, current: str = '') -> list[str]:
+    # nicknames to offer before any data for the sport has been fetched
+    key = normalize(current)
+    names = sorted(
+        string.capwords(nickname) for abbreviation, nickname in TEAM_ABBREVIATIONS.get(sport, {}).items()
+        if key in nickname or key == abbreviation.lower()
+    )
+    return names[:MAX_CHOICES]
@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import time
+from dotenv import load_dotenv
+from .db import open_db
+
+load_dotenv()
+WATCHLIST_DB_PATH = os.getenv('WATCHLIST_DB_PATH', 'watchlists.db')
+WATCHLIST_MAX_TICKERS = int(os.getenv('WATCHLIST_MAX_TICKERS', 20))
+
+# watchlists belong to a user or to a whole server
+SCOPES = ('user', 'guild')
+
+
+class WatchlistStore:
+    """
+    Ticker watchlists per user and per guild, kept in a SQLite file
+
+    The connection is opened on first use so importing the module never
+    touches the disk.
+    """
+
+    def __init__(self, path: str, max_tickers: int):
+        self.path = path
+        self.max_tickers = max_tickers
+        self._db = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = open_db(
+                self.path,
+                "CREATE TABLE IF NOT EXISTS watchlists ("
+                "scope TEXT, owner_id INTEGER, ticker TEXT, added_at REAL, "
+                "PRIMARY KEY (scope, owner_id, ticker))"
+            )
+        return self._db
+
+    def get(self, scope: str, owner_id: int) -> list[str]:
+        rows = self._connect().execute(
+            "SELECT ticker FROM watchlists WHERE scope = ? AND owner_id = ? ORDER BY added_at",
+            (scope, owner_id)
+        )
+        return [ticker for ticker, in rows]
+
+    def add(self, scope: str, owner_id: int, tickers: list[str]) -> list[str]:
+        """
+        Add tickers to a watchlist, up to max_tickers in total
+
+        Returns:
+            the tickers that were newly added
+        """
+        current = self.get(scope, owner_id)
+        room = self.max_tickers - len(current)
+        added = [ticker for ticker in tickers if ticker not in current][:max(room, 0)]
+
+        db = self._connect()
+        now = time.time()
+        db.executemany(
+            "INSERT OR IGNORE INTO watchlists VALUES (?, ?, ?, ?)",
+            [(scope, owner_id, ticker, now + i * 1e-6) for i, ticker in enumerate(added)]
+        )
+        db.commit()
+        return added
+
+    def remove(self, scope: str, owner_id: int, tickers: list[str]) -> list[str]:
+        """
+        Returns:
+            the tickers that were on the watchlist and got removed
+        """
+        current = self.get(scope, owner_id)
+        removed = [ticker for ticker in tickers if ticker in current]
+
+        db = self._connect()
+        db.executemany(
+            "DELETE FROM watchlists WHERE scope = ? AND owner_id = ? AND ticker = ?",
+            [(scope, owner_id, ticker) for ticker in removed]
+        )
+        db.commit()
+        return removed
+
+    def watched_tickers(self, limit: int = None) -> list[str]:
+        # every watchlisted ticker, the ones on the most lists first
+        query = "SELECT ticker FROM watchlists GROUP BY ticker ORDER BY COUNT(*) DESC, ticker"
+        params = ()
+        if limit is not None:
+            query += " LIMIT ?"
+            params = (limit,)
+        return [ticker for ticker, in self._connect().execute(query, params)]
+
+
+watchlist_store = WatchlistStore(WATCHLIST_DB_PATH, WATCHLIST_MAX_TICKERS)